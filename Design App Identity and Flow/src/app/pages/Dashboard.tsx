@@ -1,10 +1,10 @@
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { List, Map, Settings, Plus, LogOut, Flame, Mail, Calendar, MapPin, Building2, TrendingUp, AlertTriangle, Moon, Sun, Loader2, ChevronLeft, ChevronRight, Search, Filter, ArrowDownUp, Bot, ArrowLeft, Sparkles } from 'lucide-react';
 import { SafetyShield } from '@/app/components/civic/SafetyShield';
 import { SeverityBadge } from '@/app/components/civic/SeverityBadge';
 import { Button } from '@/app/components/ui/button';
-import { fetchFeed, Issue, getAvatar } from '@/services/api';
+import { fetchFeed, fetchClusters, Issue, MapCluster, getAvatar } from '@/services/api';
 import { useNavigate } from 'react-router';
 import { useTheme } from '@/app/context/ThemeContext';
 import { ChatbotView } from './ChatbotView';
@@ -744,6 +744,67 @@ function MapRecenter({ lat, lng }: { lat: number, lng: number }) {
   return null;
 }
 
+// Past this many issues the map draws the backend's pre-aggregated clusters
+// for the viewport instead of one marker per issue
+const MAX_MAP_MARKERS = 200;
+
+function clusterIcon(cluster: MapCluster) {
+  const size = Math.min(56, 26 + Math.round(Math.log2(cluster.count) * 4));
+  const color = cluster.max_severity >= 8 ? '#ef4444' : cluster.max_severity >= 5 ? '#f59e0b' : '#10b981';
+  return L.divIcon({
+    className: 'custom-div-icon',
+    html: `<div style="background-color: ${color}; width: ${size}px; height: ${size}px; border-radius: 50%; border: 2px solid white; display: flex; align-items: center; justify-content: center; color: white; font-weight: 700; font-size: 12px; box-shadow: 0 2px 5px rgba(0,0,0,0.3);">
+             ${cluster.count}
+           </div>`,
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2],
+    popupAnchor: [0, -size / 2]
+  });
+}
+
+// Reloads the clusters for the visible area after every pan/zoom
+function ClusterLayer() {
+  const map = useMap();
+  const [clusters, setClusters] = useState<MapCluster[]>([]);
+  const latestRequest = useRef(0);
+
+  useEffect(() => {
+    const load = async () => {
+      const request = ++latestRequest.current;
+      const b = map.getBounds();
+      const data = await fetchClusters(map.getZoom(), {
+        south: b.getSouth(), west: b.getWest(), north: b.getNorth(), east: b.getEast()
+      });
+      if (request === latestRequest.current) setClusters(data); // Drop answers for an old viewport
+    };
+    load();
+    map.on('moveend', load);
+    return () => { map.off('moveend', load); };
+  }, [map]);
+
+  return (
+    <>
+      {clusters.map(cluster => (
+        <Marker
+          key={`${cluster.lat},${cluster.lon},${cluster.count}`}
+          position={[cluster.lat, cluster.lon]}
+          icon={clusterIcon(cluster)}
+          eventHandlers={cluster.id === null ? { click: () => map.setView([cluster.lat, cluster.lon], map.getZoom() + 2) } : {}}
+        >
+          {cluster.id !== null && (
+            <Popup>
+              <div className="min-w-[160px]">
+                <h3 className="font-bold text-sm">Issue #{cluster.id}</h3>
+                <p className="text-xs text-gray-600 my-1">Severity {cluster.max_severity}/10</p>
+              </div>
+            </Popup>
+          )}
+        </Marker>
+      ))}
+    </>
+  );
+}
+
 function MapView({ issues }: { issues: Issue[] }) {
   const [userLocation, setUserLocation] = useState<{ lat: number; lng: number } | null>(null);
   const [defaultLocation] = useState({ lat: 29.3956, lng: 71.6833 }); // Bahawalpur Default
@@ -790,8 +851,8 @@ function MapView({ issues }: { issues: Issue[] }) {
 
         <MapRecenter lat={center.lat} lng={center.lng} />
 
-        {/* Issue Markers */}
-        {issues.map(issue => {
+        {/* Issue Markers (clusters once there are too many to draw one by one) */}
+        {issues.length > MAX_MAP_MARKERS ? <ClusterLayer /> : issues.map(issue => {
           const lat = Number(issue.location.lat);
           const lng = Number(issue.location.lng);
           if (isNaN(lat) || isNaN(lng)) return null;
@@ -30,6 +30,12 @@ export interface Issue {
   imageUrl?: string;
 }
 
+// Media URLs from the backend are relative ("/uploads/<key>") unless a CDN prefix is configured
+export const resolveMediaUrl = (url?: string) => {
+  if (!url) return undefined;
+  return url.startsWith("/") ? `${API_URL}${url}` : url;
+};
+
 // Helper to determine type from category
 const isGovernmentCategory = (cat: string) => {
   const govtCategories = ['GOVT', 'Road Safety', 'Public Safety', 'Sanitation', 'Urban Planning', 'Infrastructure', 'Electricity'];
@@ -142,7 +148,7 @@ export const fetchFeed = async (userLat?: number, userLon?: number) => {
       reportedBy: item.reportedBy || "Civic Citizen",
       department: getDepartment(item),
       avatar: getAvatar(item.reportedBy || "User" + item.id),
-      imageUrl: item.image_url
+      imageUrl: resolveMediaUrl(item.image_url)
     }));
   } catch (error) {
     console.error("Feed Error:", error);
@@ -219,7 +225,7 @@ export const fetchIssue = async (id: string) => {
       fairnessScore: item.fairness_score,
       disagreementRate: item.disagreement_rate,
       financialRelief: item.financial_relief,
-      imageUrl: item.image_url // Mapped from backend
+      imageUrl: resolveMediaUrl(item.image_url) // Mapped from backend
     };
   } catch (error) {
     console.error("api.ts: Fetch Issue Error:", error);
@@ -281,4 +287,33 @@ export const sendChat = async (query: string, useDocs: boolean) => {
     console.error("Chat Error:", error);
     return { reply: "Error connecting to brain." };
   }
-}
\ No newline at end of file
+}
+// 8. MAP CLUSTERS (open issues, pre-aggregated per zoom level by the backend)
+export interface MapCluster {
+  lat: number;
+  lon: number;
+  count: number;
+  max_severity: number;
+  id: number | null; // Set when the cluster is a single issue
+}
+
+export const fetchClusters = async (
+  zoom: number,
+  bounds: { south: number; west: number; north: number; east: number }
+): Promise<MapCluster[]> => {
+  const params = new URLSearchParams({
+    zoom: Math.round(zoom).toString(),
+    min_lat: bounds.south.toString(),
+    min_lon: bounds.west.toString(),
+    max_lat: bounds.north.toString(),
+    max_lon: bounds.east.toString(),
+  });
+  try {
+    const response = await fetch(`${API_URL}/clusters?${params}`);
+    const data = await response.json();
+    return Array.isArray(data) ? data : [];
+  } catch (error) {
+    console.error("Clusters Error:", error);
+    return [];
+  }
+};
@@ -1,27 +1,21 @@
-import google.generativeai as genai
 import os
 import json
-import opik
-from dotenv import load_dotenv
-
-# 1. SETUP
-load_dotenv()
-
-# Configure Google Gemini
-api_key = os.environ.get("GOOGLE_API_KEY")
-if not api_key:
-    # Fallback for safety if env not loaded
-    print("⚠️ WARNING: GOOGLE_API_KEY not found.")
-
 
 # Import our custom modules
+# (.env loading, Gemini configuration and Opik are deferred to first use / app startup)
 try:
     from backend.gemini_utils import generate_with_fallback
+    from backend.tracing import track
+    from backend.log_config import get_logger
 except ImportError:
     from gemini_utils import generate_with_fallback
+    from tracing import track
+    from log_config import get_logger
+
+log = get_logger("ai_agent")
 
 # --- OPIK EVALUATOR: FAIRNESS GUARDRAIL ---
-@opik.track(name="Fairness Evaluator")
+@track(name="Fairness Evaluator")
 def evaluate_fairness(description: str, category: str, severity: int):
     """
     Simulates a 'Real' Opik Evaluator that would normally run on the trace.
@@ -64,7 +58,7 @@ def evaluate_fairness(description: str, category: str, severity: int):
         return {"fairness_score": 85, "disagreement_rate": 0, "financial_relief": "None"}
 
 # --- AGENT 1: THE CLASSIFIER ---
-@opik.track(name="CivicFlow Classifier")
+@track(name="CivicFlow Classifier")
 def classify_issue(text_description: str, image_bytes: bytes = None, mime_type: str = None):
     prompt = f"""
     You are the CivicFlow Intelligence Agent.
@@ -104,7 +98,7 @@ def classify_issue(text_description: str, image_bytes: bytes = None, mime_type:
         
     except Exception as e:
         import time
-        print(f"❌ AI Error: {e}")
+        log.error("❌ AI Error: %s", e)
         time.sleep(3) 
         return {
             "category": "GOVT", 
@@ -121,8 +115,68 @@ def classify_issue(text_description: str, image_bytes: bytes = None, mime_type:
             "financial_relief": "None"
         }
 
+# --- AGENT 1b: BATCH CLASSIFIER ---
+# Several text-only reports share one prompt, and the fairness audit is asked
+# for in the same answer: one model round-trip for N reports instead of 2N.
+BATCH_REQUIRED_KEYS = ("category", "title", "severity", "description", "fairness_score")
+
+@track(name="CivicFlow Batch Classifier")
+def classify_issues_batch(descriptions: list):
+    """
+    Returns a list aligned with descriptions: the classification dict (same
+    keys as classify_issue) or None where the model's answer was missing or
+    malformed, so the caller can retry that report on its own.
+    """
+    reports = "\n".join(f"REPORT {i}: {json.dumps(text)}" for i, text in enumerate(descriptions))
+    prompt = f"""
+    You are the CivicFlow Intelligence Agent, triaging a BATCH of {len(descriptions)} citizen reports.
+    Handle every report independently.
+    {reports}
+
+    For EACH report:
+    1. Classify into 'GOVT' (Infrastructure, Law, Danger) or 'VOLUNTEER' (Social Needs, Help).
+    2. Act as an AI Ethics Auditor:
+       - fairness_score (0-100): safety risks high, maintenance medium, cosmetic low.
+       - disagreement_rate (0-100): high for subjective issues, low for objective facts.
+       - financial_relief: 'Eligible' for low-income areas or critical safety, else 'None'.
+
+    RETURN A JSON ARRAY ONLY, one object per report, in order:
+    [
+      {{
+        "index": 0,
+        "category": "GOVT" or "VOLUNTEER",
+        "title": "Short title (3-5 words)",
+        "severity": 1-10,
+        "description": "One technical sentence.",
+        "tags": ["tag1", "tag2"],
+        "responsible_department": "Name of the government department responsible.",
+        "legal_precedent": "Citation if GOVT",
+        "matched_volunteers_count": "Count if VOLUNTEER",
+        "ai_analysis": "Detailed analysis paragraph.",
+        "fairness_score": 95, "disagreement_rate": 5, "financial_relief": "None"
+      }}
+    ]
+    """
+    results = [None] * len(descriptions)
+    try:
+        response_text = generate_with_fallback(prompt)
+        items = json.loads(response_text.replace("```json", "").replace("```", "").strip())
+    except Exception as e:
+        log.warning("⚠️ Batch classification failed for %d reports: %s", len(descriptions), e)
+        return results
+
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not all(key in item for key in BATCH_REQUIRED_KEYS):
+            continue
+        index = item.pop("index", None)
+        if isinstance(index, int) and 0 <= index < len(results) and results[index] is None:
+            item.setdefault("disagreement_rate", 0)
+            item.setdefault("financial_relief", "None")
+            results[index] = item
+    return results
+
 # --- AGENT 2: THE MATCHER ---
-@opik.track(name="Volunteer Matcher")
+@track(name="Volunteer Matcher")
 def match_volunteers_agent(problem_description: str, candidates: list):
     prompt = f"""
     You are the CivicFlow Dispatch Coordinator.
@@ -139,7 +193,7 @@ def match_volunteers_agent(problem_description: str, candidates: list):
         return {"ranked_matches": []}
 
 # --- AGENT 3: THE FEED RANKER ---
-@opik.track(name="Feed Ranker")
+@track(name="Feed Ranker")
 def rank_issues_for_user(user_profile: dict, issues_list: list):
     prompt = f"""
     Rank issues for USER: {user_profile['name']} (Skills: {user_profile['skills']}).
@@ -158,7 +212,7 @@ def rank_issues_for_user(user_profile: dict, issues_list: list):
         return {"recommended": []}
 
 # --- AGENT 4: LEGAL DRAFTER (NEW) ---
-@opik.track(name="Legal Drafter")
+@track(name="Legal Drafter")
 def generate_legal_text(issue_title, issue_desc, category="General", ai_analysis=None):
     analysis_text = f"\n    TECHNICAL ANALYSIS: {ai_analysis}" if ai_analysis else ""
     
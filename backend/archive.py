@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import sys
+
+try:
+    from backend.database import DB_NAME, archived_from_stats, get_issue_comments, init_db
+    from backend.metrics import timed, DB_QUERY_SECONDS
+    from backend.log_config import get_logger, configure_logging
+except ImportError:
+    from database import DB_NAME, archived_from_stats, get_issue_comments, init_db
+    from metrics import timed, DB_QUERY_SECONDS
+    from log_config import get_logger, configure_logging
+
+log = get_logger("archive")
+
+# --- COLD STORAGE ---
+# Resolved/archived issues older than N days move (with their comments and
+# status history) into a separate SQLite file. The hot DB stays small enough to
+# live in the page cache; history queries union both files transparently.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DB_NAME = os.environ.get("ARCHIVE_DB_NAME", os.path.join(BASE_DIR, "civic_flow_archive.db"))
+ARCHIVE_AFTER_DAYS = 30
+
+# Tables that move together; child tables are keyed by issue_id
+ARCHIVED_TABLES = (("issues", "id"), ("comments", "issue_id"), ("status_history", "issue_id"))
+
+
+def _sync_archive_schema(c, table):
+    """Creates archive.<table> from the hot schema and adds any columns added since."""
+    c.execute(f"PRAGMA main.table_info({table})")
+    hot_cols = [(row[1], row[2]) for row in c.fetchall()]
+    c.execute(f"PRAGMA archive.table_info({table})")
+    archived_cols = {row[1] for row in c.fetchall()}
+
+    if not archived_cols:
+        cols = ", ".join(f"{name} {ctype}" + (" PRIMARY KEY" if name == "id" else "") for name, ctype in hot_cols)
+        c.execute(f"CREATE TABLE archive.{table} ({cols})")
+        if table != "issues":
+            c.execute(f"CREATE INDEX archive.idx_{table}_issue ON {table}(issue_id)")
+        return [name for name, _ in hot_cols]
+
+    for name, ctype in hot_cols:
+        if name not in archived_cols:
+            c.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {ctype}")
+    return [name for name, _ in hot_cols]
+
+
+@timed(DB_QUERY_SECONDS)
+def archive_resolved_issues(older_than_days=ARCHIVE_AFTER_DAYS, vacuum=False):
+    """
+    Moves resolved/archived issues whose status changed more than older_than_days
+    ago into the archive DB, in one transaction across both files.
+    Returns the number of issues moved.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    try:
+        c.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_NAME,))
+        columns = {table: _sync_archive_schema(c, table) for table, _ in ARCHIVED_TABLES}
+
+        c.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+        c.execute("DELETE FROM archive_ids")
+        # Rows resolved before status_updated_at existed count as old
+        c.execute("""INSERT INTO archive_ids
+                     SELECT id FROM main.issues
+                     WHERE status IN ('Resolved', 'Archived')
+                       AND COALESCE(status_updated_at, '1970-01-01') <= datetime('now', ?)""",
+                  (f"-{int(older_than_days)} days",))
+        moved = c.rowcount
+
+        if moved:
+            for table, key in ARCHIVED_TABLES:
+                cols = ", ".join(columns[table])
+                c.execute(f"""INSERT OR REPLACE INTO archive.{table} ({cols})
+                              SELECT {cols} FROM main.{table} WHERE {key} IN (SELECT id FROM archive_ids)""")
+            # Children first, then the issues themselves. Stats-neutral: moved
+            # issues keep counting for their department
+            with archived_from_stats(c, "archive_ids"):
+                for table, key in reversed(ARCHIVED_TABLES):
+                    c.execute(f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM archive_ids)")
+        conn.commit()
+
+        c.execute("DETACH DATABASE archive")
+        if moved and vacuum:
+            c.execute("VACUUM") # Give the freed pages back to the OS
+        log.info("🗄️ Archived %d resolved issues older than %s days", moved, older_than_days)
+        return moved
+    finally:
+        conn.close()
+
+
+def _archive_conn():
+    if not os.path.exists(ARCHIVE_DB_NAME):
+        return None
+    conn = sqlite3.connect(ARCHIVE_DB_NAME)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@timed(DB_QUERY_SECONDS)
+def get_archived_issue(issue_id):
+    conn = _archive_conn()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute("SELECT * FROM issues WHERE id=?", (issue_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None # Archive file exists but nothing was archived yet
+    conn.close()
+    if row:
+        return {**dict(row), "archived": True}
+    return None
+
+
+@timed(DB_QUERY_SECONDS)
+def get_archived_comments(issue_id, before=None, before_id=None, limit=50):
+    if not os.path.exists(ARCHIVE_DB_NAME):
+        return []
+    # Same query as the hot path, pointed at the archive file
+    try:
+        return get_issue_comments(issue_id, before, before_id, limit, db_name=ARCHIVE_DB_NAME)
+    except sqlite3.OperationalError:
+        return []
+
+
+@timed(DB_QUERY_SECONDS)
+def get_issues(status=None, include_archived=False, before_id=None, limit=100):
+    """
+    Newest-first issue listing. With include_archived the hot and archive
+    tables are unioned, so callers see one continuous history.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+
+    where, params = [], []
+    if status:
+        where.append("status=?")
+        params.append(status)
+    if before_id is not None:
+        where.append("id<?")
+        params.append(before_id)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    cols = "id, title, category, description, lat, lon, tags, severity, status, department, reported_by, image_url, comment_count, status_updated_at"
+
+    sql = f"SELECT {cols}, 0 AS archived FROM main.issues {clause}"
+    if include_archived and os.path.exists(ARCHIVE_DB_NAME):
+        c.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_NAME,))
+        c.execute("SELECT count(*) FROM archive.sqlite_master WHERE type='table' AND name='issues'")
+        if c.fetchone()[0]:
+            sql += f" UNION ALL SELECT {cols}, 1 AS archived FROM archive.issues {clause}"
+            params = params * 2
+    sql += " ORDER BY id DESC LIMIT ?"
+
+    c.execute(sql, (*params, limit))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    configure_logging()
+    init_db()
+    archive_resolved_issues(days, vacuum=True)
@@ -0,0 +1,137 @@
+import asyncio
+import base64
+import binascii
+import json
+import os
+import weakref
+
+try:
+    from backend.ai_agent import classify_issue, classify_issues_batch
+    from backend.blob_store import save_blob, media_url
+    from backend.metrics import AI_BATCH_ITEMS
+    from backend.log_config import get_logger
+except ImportError:
+    from ai_agent import classify_issue, classify_issues_batch
+    from blob_store import save_blob, media_url
+    from metrics import AI_BATCH_ITEMS
+    from log_config import get_logger
+
+log = get_logger("batch_reports")
+
+# --- BATCH REPORT ANALYSIS ---
+# Call centers and SMS gateways post hundreds of reports at once. Text-only
+# reports are packed PACK_SIZE to a prompt (classification + fairness audit in
+# one answer); reports with an image, and any report the packed answer missed,
+# go through classify_issue on their own. Every model call waits for one of
+# MODEL_CONCURRENCY slots, so a big batch queues instead of flooding Gemini.
+# Results stream back as NDJSON lines in completion order.
+MODEL_CONCURRENCY = int(os.environ.get("MODEL_CONCURRENCY", "4"))
+PACK_SIZE = 8
+PACK_MAX_CHARS = 4000  # Long reports get fewer neighbours per prompt
+MAX_BATCH_REPORTS = 500
+
+MOCK_LAT, MOCK_LON = 29.3956, 71.6833  # Same mock GPS as /report
+
+# One semaphore per event loop (tests and the load harness run several loops)
+_slots = weakref.WeakKeyDictionary()
+
+
+def model_slots():
+    loop = asyncio.get_running_loop()
+    if loop not in _slots:
+        _slots[loop] = asyncio.Semaphore(MODEL_CONCURRENCY)
+    return _slots[loop]
+
+
+def pack_reports(items):
+    """Splits text-only item indices into packs; returns (packs, solo indices)."""
+    packs, solo, current, chars = [], [], [], 0
+    for i, item in enumerate(items):
+        if item.get("image_base64"):
+            solo.append(i)
+            continue
+        size = len(item.get("description") or "")
+        if current and (len(current) >= PACK_SIZE or chars + size > PACK_MAX_CHARS):
+            packs.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += size
+    if current:
+        packs.append(current)
+    return packs, solo
+
+
+def _result(index, item, analysis, mode, image_key=None):
+    AI_BATCH_ITEMS.inc(mode)
+    analysis['lat'] = MOCK_LAT
+    analysis['lon'] = MOCK_LON
+    analysis['image_key'] = image_key
+    analysis['image_url'] = media_url(image_key)
+    return {"index": index, "ref": item.get("ref"), "status": "analyzed", "mode": mode, "analysis": analysis}
+
+
+def _error(index, item, message):
+    AI_BATCH_ITEMS.inc("error")
+    return {"index": index, "ref": item.get("ref"), "status": "error", "error": message}
+
+
+def _classify_one(item):
+    """Blocking: decode + store the image (if any), then the two-call classify_issue."""
+    image_bytes = mime_type = image_key = None
+    if item.get("image_base64"):
+        image_bytes = base64.b64decode(item["image_base64"], validate=True)
+        mime_type = item.get("mime_type") or "image/jpeg"
+        image_key = save_blob(image_bytes, None, mime_type)
+    return classify_issue(item.get("description") or "", image_bytes, mime_type), image_key
+
+
+async def analyze_reports(items):
+    """Async generator of NDJSON lines, one per item, as each finishes."""
+    results = asyncio.Queue()
+    slots = model_slots()
+
+    async def run_single(i):
+        try:
+            async with slots:
+                analysis, image_key = await asyncio.to_thread(_classify_one, items[i])
+            results.put_nowait(_result(i, items[i], analysis, "single", image_key))
+        except binascii.Error:
+            results.put_nowait(_error(i, items[i], "image_base64 is not valid base64"))
+        except Exception as e:
+            log.error("❌ Batch item %d failed: %s", i, e)
+            results.put_nowait(_error(i, items[i], "analysis failed"))
+
+    async def run_pack(indices):
+        try:
+            async with slots:
+                analyses = await asyncio.to_thread(classify_issues_batch, [items[i]["description"] for i in indices])
+        except Exception as e:
+            log.warning("⚠️ Pack of %d failed: %s", len(indices), e)
+            analyses = [None] * len(indices)
+        missed = []
+        for i, analysis in zip(indices, analyses):
+            if analysis is None:
+                missed.append(i)
+            else:
+                results.put_nowait(_result(i, items[i], analysis, "batched"))
+        if missed:
+            log.info("Pack answered %d/%d reports; classifying the rest one by one", len(indices) - len(missed), len(indices))
+            await asyncio.gather(*(run_single(i) for i in missed))
+
+    valid = []
+    for i, item in enumerate(items):
+        if not item.get("description") and not item.get("image_base64"):
+            results.put_nowait(_error(i, item, "Empty report"))
+        else:
+            valid.append(i)
+
+    # Pack over the non-empty items only, then map back to request indices
+    packs, solo = pack_reports([items[i] for i in valid])
+    tasks = [asyncio.create_task(run_pack([valid[j] for j in pack])) for pack in packs]
+    tasks += [asyncio.create_task(run_single(valid[j])) for j in solo]
+    try:
+        for _ in range(len(items)):
+            yield json.dumps(await results.get(), ensure_ascii=False) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()  # Client went away: stop scheduling model calls
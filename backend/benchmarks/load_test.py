@@ -0,0 +1,183 @@
+"""
+Offline load test for the CivicFlow API.
+
+Seeds a throwaway SQLite database at the chosen scale, swaps Gemini for a local
+fake model (latency and failure injection), then drives the API in-process
+through httpx's ASGI transport with N concurrent clients. Prints throughput and
+p50/p95/p99 latency per scenario.
+
+    cd backend
+    python benchmarks/load_test.py --scale 1k --concurrency 16 --requests 2000
+    python benchmarks/load_test.py --scale 100k --db /tmp/cf100k.db        # reuse the seeded DB
+    python benchmarks/load_test.py --mix issue=5,comments_read=3 --latency 0.2 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BACKEND_DIR, BENCH_DIR]
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+DEFAULT_MIX = "issue=30,comments_read=20,comments_post=10,my_feed=15,report=10,publish=5,chat=10"
+FEED_FORM = {"user_skills": "Medical, Rescue", "user_lat": "29.3956", "user_lon": "71.6833"}
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# --- SCENARIOS: (rng, issue_count) -> (method, url, request kwargs) ---
+def _issue_id(rng, issue_count):
+    return rng.randint(1, issue_count)
+
+
+SCENARIOS = {
+    "issue": lambda rng, n: ("GET", f"/issue/{_issue_id(rng, n)}", {}),
+    "comments_read": lambda rng, n: ("GET", f"/comments/{_issue_id(rng, n)}", {}),
+    "comments_post": lambda rng, n: ("POST", "/comments", {"data": {
+        "issue_id": _issue_id(rng, n), "user_name": "Load Tester", "text": "Benchmark comment"}}),
+    "my_feed": lambda rng, n: ("POST", "/my_feed", {"data": FEED_FORM}),
+    "my_feed_user": lambda rng, n: ("POST", "/my_feed", {"data": {"user_id": rng.randint(1, max(1, n // 10))}}),
+    "report": lambda rng, n: ("POST", "/report", {"data": {"description": "Huge pothole near the bus stop"}}),
+    "report_batch": lambda rng, n: ("POST", "/report/batch", {"json": {"reports": [
+        {"description": f"SMS {i}: open manhole near the market", "ref": str(i)} for i in range(20)]}}),
+    "dispatch": lambda rng, n: ("POST", "/dispatch", {"data": {"issue_id": _issue_id(rng, n), "skills": "Rescue"}}),
+    "publish": lambda rng, n: ("POST", "/publish_issue", {"json": {
+        "title": "Benchmark pothole", "category": "GOVT", "description": "Created by the load test",
+        "lat": 29.3956 + rng.uniform(-0.05, 0.05), "lon": 71.6833 + rng.uniform(-0.05, 0.05),
+        "tags": ["Road Safety"], "severity": rng.randint(1, 10)}}),
+    "chat": lambda rng, n: ("POST", "/chat", {"data": {"query": "Which law covers open sewage?", "use_docs": "true"}}),
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+async def run_load(app, mix, issue_count, concurrency, total_requests, seed):
+    import httpx
+
+    names, weights = list(mix), list(mix.values())
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    remaining = [total_requests]
+
+    async def worker(worker_id, client):
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            method, url, kwargs = SCENARIOS[name](rng, issue_count)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            results[name]["latencies"].append(time.perf_counter() - started)
+            if not ok:
+                results[name]["errors"] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def report(results, elapsed):
+    total = sum(len(r["latencies"]) for r in results.values())
+    summary = {"requests": total, "seconds": round(elapsed, 3), "throughput_rps": round(total / elapsed, 1), "scenarios": {}}
+    print(f"\n{'scenario':<15}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in results.items():
+        lat = sorted(r["latencies"])
+        row = {"count": len(lat), "errors": r["errors"],
+               "p50_ms": percentile(lat, 0.50) * 1000, "p95_ms": percentile(lat, 0.95) * 1000,
+               "p99_ms": percentile(lat, 0.99) * 1000, "max_ms": (lat[-1] if lat else 0) * 1000}
+        summary["scenarios"][name] = {k: round(v, 2) for k, v in row.items()}
+        print(f"{name:<15}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+              f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    print(f"\n{total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="number of seeded issues")
+    parser.add_argument("--db", help="SQLite file to use; seeded only if it does not exist yet")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,... (scenarios: %s)" % ", ".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a model attempt fails")
+    parser.add_argument("--retry-pause", type=float, default=None, help="override the pause between model fallbacks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    workdir = tempfile.mkdtemp(prefix="civicflow-bench-")
+    db_path = args.db or os.path.join(workdir, "civic_flow.db")
+    needs_seed = not os.path.exists(db_path)
+    # Everything the app writes goes to the scratch dir; must be set before importing it
+    os.environ.update({
+        "DB_NAME": db_path,
+        "ARCHIVE_DB_NAME": os.path.join(workdir, "archive.db"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "NOTICE_ARTIFACTS_DIR": os.path.join(workdir, "notices"),
+        "PREWARM_SDKS": "0",
+        "TRACE_SINK": os.environ.get("TRACE_SINK", "off"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+
+    import fake_model
+    import gemini_utils
+    import main as api
+    import seed_data
+    from startup import startup
+
+    issue_count = SCALES[args.scale]
+    if needs_seed:
+        print(f"🌱 Seeding {issue_count:,} issues into {db_path} ...")
+        started = time.perf_counter()
+        seed_data.seed(issues=issue_count, seed=args.seed)
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+    startup(prewarm=False)  # ASGITransport does not run the lifespan
+
+    fake_model.install(args.latency, args.jitter, args.failure_rate, args.seed)
+    if args.retry_pause is not None:
+        gemini_utils.RETRY_PAUSE_SECONDS = args.retry_pause
+
+    print(f"🚦 {args.requests} requests, concurrency {args.concurrency}, fake model {args.latency * 1000:.0f}ms "
+          f"±{args.jitter * 1000:.0f}ms, failure rate {args.failure_rate:.0%}")
+    try:
+        results, elapsed = asyncio.run(run_load(api.app, mix, issue_count, args.concurrency, args.requests, args.seed))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)  # A --db file lives outside it and is kept
+    summary = report(results, elapsed)
+    summary.update({"scale": args.scale, "concurrency": args.concurrency, "fake_latency": args.latency,
+                    "failure_rate": args.failure_rate})
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Worker cold-start benchmark.
+
+Boots the API in fresh interpreters (like a new uvicorn worker or an autoscaled
+instance) and times `import main` plus the lifespan startup phase, first against
+an empty database (schema created) and then against a current one (schema check
+skipped). Exits non-zero if the median boot exceeds the budget.
+
+    cd backend && python benchmarks/startup_bench.py --runs 10 --budget 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from startup import startup
+startup(prewarm=False)
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "startup": t2 - t1, "total": t2 - t0}))
+"""
+
+
+def boot_once(db_path):
+    env = {**os.environ, "DB_NAME": db_path, "PREWARM_SDKS": "0"}
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(label, samples):
+    print(f"\n{label} ({len(samples)} runs)")
+    for phase in ("import", "startup", "total"):
+        values = [s[phase] * 1000 for s in samples]
+        print(f"  {phase:<8} median {statistics.median(values):7.1f} ms   max {max(values):7.1f} ms")
+    return statistics.median(s["total"] for s in samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="max median boot time in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "civic_flow.db")
+        cold = [boot_once(db_path)]  # First boot creates and seeds the schema
+        warm = [boot_once(db_path) for _ in range(args.runs)]
+
+    summarize("Empty database", cold)
+    median = summarize("Current schema", warm)
+    if median > args.budget:
+        print(f"\n❌ Median boot {median:.3f}s exceeds the {args.budget:.3f}s budget")
+        sys.exit(1)
+    print(f"\n✅ Median boot {median:.3f}s (budget {args.budget:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
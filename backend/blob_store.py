@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+
+from fastapi import Request
+from fastapi.responses import Response, FileResponse, StreamingResponse
+
+# --- CONTENT-ADDRESSED UPLOAD STORE ---
+# Blobs live at uploads/<aa>/<bb>/<sha256><ext>. The key (the path below uploads/)
+# is what we keep in the DB; the same bytes uploaded twice map to the same key.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", os.path.join(BASE_DIR, "uploads"))
+LEGACY_UPLOAD_DIR = "uploads"  # Old flat upload_{rand}_{name} files (relative to CWD)
+
+# Public prefix for media URLs. Empty = relative ("/uploads/<key>"), so a CDN or
+# reverse proxy in front of the API can serve them without rewriting rows.
+MEDIA_BASE_URL = os.environ.get("MEDIA_BASE_URL", "").rstrip("/")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+MIME_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/heic": ".heic",
+}
+
+_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]{1,5})?$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _extension(filename, mime_type):
+    if mime_type in MIME_EXTENSIONS:
+        return MIME_EXTENSIONS[mime_type]
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,5}", ext) else ""
+
+
+def blob_path(key):
+    return os.path.join(UPLOAD_DIR, *key.split("/"))
+
+
+def is_blob_key(key):
+    return bool(key) and bool(_KEY_RE.match(key))
+
+
+def save_blob(data, filename=None, mime_type=None):
+    """
+    Stores bytes under their SHA-256 and returns the relative key.
+    Writing is skipped when the blob already exists (dedup).
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest[:2]}/{digest[2:4]}/{digest}{_extension(filename, mime_type)}"
+    path = blob_path(key)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp name then rename, so readers never see a partial blob
+        tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return key
+
+
+def to_key(value):
+    """
+    Normalizes whatever the client sent back (key, /uploads/<key> or an absolute
+    URL from older builds) into the value we store in the DB.
+    """
+    if not value:
+        return None
+    if "/uploads/" in value:
+        return value.split("/uploads/", 1)[1]
+    return value
+
+
+def media_url(key):
+    """Public URL for a stored key. Legacy absolute URLs pass through unchanged."""
+    if not key:
+        return None
+    if "://" in key:
+        return key
+    return f"{MEDIA_BASE_URL}/uploads/{key}"
+
+
+def _iter_file(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_blob(request: Request, key: str):
+    """
+    Serves a blob with a strong ETag (its hash), immutable caching,
+    If-None-Match -> 304 and single-range (206) support.
+    """
+    if not is_blob_key(key):
+        return _serve_legacy(key)
+
+    path = blob_path(key)
+    if not os.path.isfile(path):
+        return Response(status_code=404)
+
+    digest = key.rsplit("/", 1)[1].split(".", 1)[0]
+    etag = f'"{digest}"'
+    ext = os.path.splitext(path)[1]
+    media_type = next((m for m, e in MIME_EXTENSIONS.items() if e == ext), "application/octet-stream")
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        match = _RANGE_RE.match(range_header.strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(size - int(match.group(2)), 0)
+            end = size - 1
+        end = min(end, size - 1)
+
+        if start > end or start >= size:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+        length = end - start + 1
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(length)})
+        return StreamingResponse(_iter_file(path, start, length), status_code=206,
+                                 media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def _serve_legacy(name):
+    # Old uploads were flat files; keep them reachable but never outside the dir
+    if "/" in name or "\\" in name or name.startswith("."):
+        return Response(status_code=404)
+    path = os.path.join(LEGACY_UPLOAD_DIR, name)
+    if not os.path.isfile(path):
+        return Response(status_code=404)
+    return FileResponse(path)
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import sqlite3
+import time
+
+try:
+    from backend.database import DB_NAME, ISSUE_COLUMNS
+    from backend.blob_store import media_url
+    from backend.metrics import DB_QUERY_SECONDS
+except ImportError:
+    from database import DB_NAME, ISSUE_COLUMNS
+    from blob_store import media_url
+    from metrics import DB_QUERY_SECONDS
+
+# --- BULK EXPORT ---
+# Issues and comments stream out as NDJSON or CSV in id order, EXPORT_BATCH
+# rows at a time, so memory stays flat no matter how big the table is. Each
+# batch is its own short keyset query (id > last_id): a slow client never holds
+# a read lock that would stall writers on the (non-WAL) DB. since_id lets a
+# partner resume or sync incrementally from the last id they saw.
+EXPORT_BATCH = 500
+
+COMMENT_COLUMNS = ("id", "issue_id", "user_name", "avatar", "text", "timestamp")
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _iter_rows(table, columns, where, params, since_id, batch_size):
+    # check_same_thread=False: StreamingResponse pulls each chunk on whichever
+    # threadpool worker is free. Access is still strictly sequential.
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE id > ?{''.join(' AND ' + w for w in where)} ORDER BY id LIMIT ?"
+    last_id = since_id or 0
+    try:
+        while True:
+            started = time.perf_counter()
+            rows = conn.execute(sql, (last_id, *params, batch_size)).fetchall()
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, f"export_{table}")
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]['id']
+    finally:
+        conn.close()
+
+
+def iter_issue_batches(status=None, since_id=None, batch_size=EXPORT_BATCH):
+    where, params = [], []
+    if status:
+        where.append("status=?")
+        params.append(status)
+    return _iter_rows("issues", ISSUE_COLUMNS, where, params, since_id, batch_size)
+
+
+def iter_comment_batches(issue_id=None, since_id=None, batch_size=EXPORT_BATCH):
+    where, params = [], []
+    if issue_id is not None:
+        where.append("issue_id=?")
+        params.append(issue_id)
+    return _iter_rows("comments", COMMENT_COLUMNS, where, params, since_id, batch_size)
+
+
+def _issue_record(row):
+    """
+    Row -> export shape. Same field names /issues/import accepts: a re-import keeps
+    status, status_updated_at and the audit fields, under new ids and without comments.
+    """
+    record = dict(row)
+    record['tags'] = json.loads(record['tags']) if record.get('tags') else []
+    record['image_url'] = media_url(record.get('image_url'))
+    return record
+
+
+def to_ndjson(batches, transform=dict):
+    for rows in batches:
+        yield "".join(json.dumps(transform(row), ensure_ascii=False) + "\n" for row in rows)
+
+
+def to_csv(batches, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()  # Header only: the table was empty
+
+
+def export_issues(fmt, status=None, since_id=None):
+    """Generator of text chunks for StreamingResponse."""
+    batches = iter_issue_batches(status, since_id)
+    if fmt == "csv":
+        return to_csv(batches, ISSUE_COLUMNS)
+    return to_ndjson(batches, _issue_record)
+
+
+def export_comments(fmt, issue_id=None, since_id=None):
+    batches = iter_comment_batches(issue_id, since_id)
+    if fmt == "csv":
+        return to_csv(batches, COMMENT_COLUMNS)
+    return to_ndjson(batches)
@@ -0,0 +1,73 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+try:
+    from backend.database import add_comments_batch
+    from backend.log_config import get_logger
+except ImportError:
+    from database import add_comments_batch
+    from log_config import get_logger
+
+log = get_logger("comment_writer")
+
+# --- GROUP-COMMIT COMMENT WRITER ---
+# A burst of comments (a viral issue) becomes a few small transactions instead
+# of one connect+commit per comment. The first comment waits at most
+# MAX_WAIT_SECONDS for company before its batch is written.
+MAX_BATCH = 64
+MAX_WAIT_SECONDS = 0.005
+
+
+class CommentWriter:
+    def __init__(self, max_batch=MAX_BATCH, max_wait=MAX_WAIT_SECONDS):
+        self._queue = queue.Queue()
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, issue_id, user_name, text, avatar=""):
+        """Queues one comment; the Future resolves to its new id once committed."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put(((issue_id, user_name, text, avatar), future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="civicflow-comment-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives within the wait window
+            try:
+                while len(batch) < self._max_batch:
+                    batch.append(self._queue.get(timeout=self._max_wait))
+            except queue.Empty:
+                pass
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            ids = add_comments_batch([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # The whole transaction rolled back: retry one by one so only the bad row fails
+                log.warning("⚠️ Comment batch of %d failed (%s); writing rows one at a time", len(batch), e)
+                for item in batch:
+                    self._write([item])
+                return
+            log.error("❌ Comment write failed: %s", e)
+            batch[0][1].set_exception(e)
+            return
+        for (_, future), comment_id in zip(batch, ids):
+            future.set_result(comment_id)
+
+
+COMMENT_WRITER = CommentWriter()
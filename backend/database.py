@@ -1,9 +1,23 @@
 import sqlite3
 import json
 import os
+from contextlib import contextmanager
+
+try:
+    from backend.metrics import timed, DB_QUERY_SECONDS
+    from backend.log_config import get_logger
+except ImportError:
+    from metrics import timed, DB_QUERY_SECONDS
+    from log_config import get_logger
+
+log = get_logger("database")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(BASE_DIR, "civic_flow.db")
+DB_NAME = os.environ.get("DB_NAME", os.path.join(BASE_DIR, "civic_flow.db"))
+
+# Stored in PRAGMA user_version once init_db has brought the file up to date.
+# Bump it whenever init_db gains a table, index, trigger or migration.
+SCHEMA_VERSION = 5
 
 # --- THE GOLDEN DATASET (Scripted for Demo) ---
 DEMO_VOLUNTEERS = [
@@ -113,27 +127,55 @@ DEMO_ISSUES = [
 ]
 
 
-def get_issue_comments(issue_id):
-    conn = sqlite3.connect(DB_NAME)
+@timed(DB_QUERY_SECONDS)
+def get_issue_comments(issue_id, before=None, before_id=None, limit=50, db_name=DB_NAME):
+    """
+    Newest-first page of comments. (before, before_id) is the cursor from the
+    last row of the previous page; ties on timestamp are broken by id.
+    """
+    conn = sqlite3.connect(db_name)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
-    c.execute("SELECT * FROM comments WHERE issue_id=? ORDER BY timestamp DESC", (issue_id,))
+    if before is not None and before_id is not None:
+        c.execute("""SELECT id, issue_id, user_name, avatar, text, timestamp FROM comments
+                     WHERE issue_id=? AND (timestamp < ? OR (timestamp = ? AND id < ?))
+                     ORDER BY timestamp DESC, id DESC LIMIT ?""",
+                  (issue_id, before, before, before_id, limit))
+    else:
+        c.execute("""SELECT id, issue_id, user_name, avatar, text, timestamp FROM comments
+                     WHERE issue_id=? ORDER BY timestamp DESC, id DESC LIMIT ?""",
+                  (issue_id, limit))
     rows = c.fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
-def add_comment(issue_id, user_name, text, avatar=""):
-    print(f"DEBUG: Adding comment for issue {issue_id} by {user_name}")
+@timed(DB_QUERY_SECONDS)
+def add_comments_batch(comments):
+    """
+    Inserts many comments in ONE transaction and bumps issues.comment_count.
+    comments: list of (issue_id, user_name, text, avatar). Returns new ids in order.
+    """
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
-    c.execute("INSERT INTO comments (issue_id, user_name, text, avatar) VALUES (?, ?, ?, ?)", 
-              (issue_id, user_name, text, avatar))
-    comment_id = c.lastrowid
-    conn.commit()
-    print(f"DEBUG: Comment added with ID {comment_id}")
-    conn.close()
-    return comment_id
+    ids = []
+    counts = {}
+    try:
+        for issue_id, user_name, text, avatar in comments:
+            c.execute("INSERT INTO comments (issue_id, user_name, text, avatar) VALUES (?, ?, ?, ?)",
+                      (issue_id, user_name, text, avatar))
+            ids.append(c.lastrowid)
+            counts[issue_id] = counts.get(issue_id, 0) + 1
+        c.executemany("UPDATE issues SET comment_count = comment_count + ? WHERE id=?",
+                      [(n, issue_id) for issue_id, n in counts.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    return ids
 
+def add_comment(issue_id, user_name, text, avatar=""):
+    return add_comments_batch([(issue_id, user_name, text, avatar)])[0]
+
+@timed(DB_QUERY_SECONDS)
 def get_issue_by_id(issue_id):
     conn = sqlite3.connect(DB_NAME)
     conn.row_factory = sqlite3.Row
@@ -145,9 +187,232 @@ def get_issue_by_id(issue_id):
         return dict(row)
     return None
 
+ISSUE_COLUMNS = ("id", "title", "category", "description", "lat", "lon", "tags", "severity", "avatar",
+                 "status", "ai_analysis", "reported_by", "department", "ai_confidence", "opik_trace_id",
+                 "fairness_score", "disagreement_rate", "financial_relief", "image_url", "comment_count",
+                 "status_updated_at")
+
+@timed(DB_QUERY_SECONDS)
+def get_issue_fields(issue_id, fields):
+    """Primary-key fetch that projects only the requested columns."""
+    cols = [f for f in fields if f in ISSUE_COLUMNS]  # Whitelist: names go into SQL
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(cols)} FROM issues WHERE id=?", (issue_id,))
+    row = c.fetchone()
+    conn.close()
+    if row:
+        return dict(row)
+    return None
+
+# --- ISSUE LIFECYCLE ---
+ISSUE_STATUSES = ('Open', 'In Progress', 'Resolved', 'Archived')
+STATUS_TRANSITIONS = {
+    'Open': ('In Progress', 'Resolved'),
+    'In Progress': ('Open', 'Resolved'),
+    'Resolved': ('Open', 'Archived'),  # Reopen, or close for good
+    'Archived': (),
+}
+
+@timed(DB_QUERY_SECONDS)
+def update_issue_status(issue_id, new_status, changed_by="Civic Citizen", note=""):
+    """
+    Moves an issue along the lifecycle and appends to status_history in the
+    same transaction. Returns the previous status, None if the issue does not
+    exist, and raises ValueError for a transition that is not allowed.
+    """
+    if new_status not in ISSUE_STATUSES:
+        raise ValueError(f"Unknown status '{new_status}'")
+
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE") # Read-check-write without a racing writer
+        c.execute("SELECT status FROM issues WHERE id=?", (issue_id,))
+        row = c.fetchone()
+        if not row:
+            conn.rollback()
+            return None
+
+        old_status = row[0] or 'Open'
+        if new_status not in STATUS_TRANSITIONS.get(old_status, ()):
+            conn.rollback()
+            raise ValueError(f"Cannot move issue from '{old_status}' to '{new_status}'")
+
+        c.execute("UPDATE issues SET status=?, status_updated_at=CURRENT_TIMESTAMP WHERE id=?", (new_status, issue_id))
+        c.execute("INSERT INTO status_history (issue_id, from_status, to_status, changed_by, note) VALUES (?, ?, ?, ?, ?)",
+                  (issue_id, old_status, new_status, changed_by, note))
+        conn.commit()
+        return old_status
+    finally:
+        conn.close()
+
+@timed(DB_QUERY_SECONDS)
+def get_status_history(issue_id):
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("""SELECT from_status, to_status, changed_by, note, changed_at FROM status_history
+                 WHERE issue_id=? ORDER BY id""", (issue_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+# --- DEPARTMENT STATS (materialized aggregates) ---
+# department_stats holds running totals; department_stats_daily holds per-day
+# buckets for the rolling trend window. Both are maintained by triggers, so every
+# write path (API, bulk import, scripts) keeps them current.
+RESOLVED_STATUSES = ('Resolved', 'Archived')
+TREND_WINDOW_DAYS = 7
+
+# Deletes (cleanup scripts, populate_db) take the issue back out. Archiving
+# suspends this trigger: the issue still exists, just in the other file.
+# opened buckets stay: issues have no creation timestamp to find the day by.
+DELETE_STATS_TRIGGER_SQL = '''CREATE TRIGGER IF NOT EXISTS trg_department_stats_delete AFTER DELETE ON issues
+                 BEGIN
+                    UPDATE department_stats
+                    SET total = total - 1,
+                        resolved = resolved - CASE WHEN OLD.status IN ('Resolved', 'Archived') THEN 1 ELSE 0 END
+                    WHERE department = COALESCE(OLD.department, 'General');
+                    UPDATE department_stats_daily SET resolved = resolved - 1
+                    WHERE OLD.status IN ('Resolved', 'Archived')
+                      AND department = COALESCE(OLD.department, 'General') AND day = date(OLD.status_updated_at);
+                 END'''
+
+def init_department_stats(c, rebuild=False):
+    c.execute('''CREATE TABLE IF NOT EXISTS department_stats (
+                    department TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    resolved INTEGER NOT NULL DEFAULT 0
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS department_stats_daily (
+                    department TEXT,
+                    day TEXT,
+                    opened INTEGER NOT NULL DEFAULT 0,
+                    resolved INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (department, day)
+                ) WITHOUT ROWID''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_department_stats_insert AFTER INSERT ON issues
+                 BEGIN
+                    INSERT INTO department_stats (department, total, resolved)
+                    VALUES (COALESCE(NEW.department, 'General'), 1,
+                            CASE WHEN NEW.status IN ('Resolved', 'Archived') THEN 1 ELSE 0 END)
+                    ON CONFLICT(department) DO UPDATE SET total = total + 1, resolved = resolved + excluded.resolved;
+                    INSERT INTO department_stats_daily (department, day, opened)
+                    VALUES (COALESCE(NEW.department, 'General'), date('now'), 1)
+                    ON CONFLICT(department, day) DO UPDATE SET opened = opened + 1;
+                    INSERT INTO department_stats_daily (department, day, resolved)
+                    SELECT COALESCE(NEW.department, 'General'), date(NEW.status_updated_at), 1
+                    WHERE NEW.status IN ('Resolved', 'Archived') AND NEW.status_updated_at IS NOT NULL
+                    ON CONFLICT(department, day) DO UPDATE SET resolved = resolved + 1;
+                 END''')
+
+    # Only fires when an issue crosses the resolved/unresolved boundary
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_department_stats_status AFTER UPDATE OF status ON issues
+                 WHEN (OLD.status IN ('Resolved', 'Archived')) != (NEW.status IN ('Resolved', 'Archived'))
+                 BEGIN
+                    UPDATE department_stats
+                    SET resolved = resolved + CASE WHEN NEW.status IN ('Resolved', 'Archived') THEN 1 ELSE -1 END
+                    WHERE department = COALESCE(NEW.department, 'General');
+                    INSERT INTO department_stats_daily (department, day, resolved)
+                    VALUES (COALESCE(NEW.department, 'General'), date('now'),
+                            CASE WHEN NEW.status IN ('Resolved', 'Archived') THEN 1 ELSE -1 END)
+                    ON CONFLICT(department, day) DO UPDATE SET resolved = resolved + excluded.resolved;
+                 END''')
+
+    # Issues moved to cold storage keep counting (see archived_from_stats)
+    c.execute('''CREATE TABLE IF NOT EXISTS department_stats_archived (
+                    department TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    resolved INTEGER NOT NULL DEFAULT 0
+                )''')
+
+    c.execute(DELETE_STATS_TRIGGER_SQL)
+
+    # First run on an existing DB (or one from before the daily backfill): rebuild from the issues there
+    c.execute("SELECT count(*) FROM department_stats")
+    if rebuild or c.fetchone()[0] == 0:
+        rebuild_department_stats(c)
+        c.connection.commit()
+
+def rebuild_department_stats(c):
+    """
+    Recomputes totals (hot issues plus department_stats_archived), and the
+    resolved side of the daily buckets from each resolved issue's
+    status_updated_at. opened buckets are left as recorded.
+    """
+    c.execute("DELETE FROM department_stats")
+    c.execute('''INSERT INTO department_stats (department, total, resolved)
+                 SELECT department, SUM(total), SUM(resolved) FROM (
+                    SELECT COALESCE(department, 'General') AS department, count(*) AS total,
+                           SUM(CASE WHEN status IN ('Resolved', 'Archived') THEN 1 ELSE 0 END) AS resolved
+                    FROM issues GROUP BY COALESCE(department, 'General')
+                    UNION ALL
+                    SELECT department, total, resolved FROM department_stats_archived
+                 ) GROUP BY department''')
+    c.execute("UPDATE department_stats_daily SET resolved = 0 WHERE resolved != 0")
+    c.execute('''INSERT INTO department_stats_daily (department, day, resolved)
+                 SELECT COALESCE(department, 'General'), date(status_updated_at), count(*)
+                 FROM issues
+                 WHERE status IN ('Resolved', 'Archived') AND status_updated_at IS NOT NULL
+                 GROUP BY COALESCE(department, 'General'), date(status_updated_at)
+                 ON CONFLICT(department, day) DO UPDATE SET resolved = excluded.resolved''')
+    c.execute("DELETE FROM department_stats_daily WHERE opened = 0 AND resolved = 0")
+
+@contextmanager
+def archived_from_stats(c, ids_table):
+    """
+    Wraps deleting the issues listed in ids_table (an id column) after they were
+    copied to cold storage: they move into department_stats_archived and the
+    delete trigger is suspended, so the totals do not change. Must run inside the
+    caller's transaction, so a failure rolls back the trigger drop too.
+    """
+    c.execute(f'''INSERT INTO department_stats_archived (department, total, resolved)
+                  SELECT COALESCE(department, 'General'), count(*),
+                         SUM(CASE WHEN status IN ('Resolved', 'Archived') THEN 1 ELSE 0 END)
+                  FROM main.issues WHERE id IN (SELECT id FROM {ids_table})
+                  GROUP BY COALESCE(department, 'General')
+                  ON CONFLICT(department) DO UPDATE SET total = total + excluded.total,
+                                                        resolved = resolved + excluded.resolved''')
+    c.execute("DROP TRIGGER IF EXISTS trg_department_stats_delete")
+    yield
+    c.execute(DELETE_STATS_TRIGGER_SQL)
+
+@timed(DB_QUERY_SECONDS)
+def get_department_stats():
+    """
+    One indexed read: running totals joined with the last two trend windows
+    of daily buckets (primary-key range on department_stats_daily).
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('''SELECT s.department, s.total, s.resolved,
+                        COALESCE(SUM(CASE WHEN d.day > date('now', ?) THEN d.resolved END), 0) AS resolved_recent,
+                        COALESCE(SUM(CASE WHEN d.day <= date('now', ?) THEN d.resolved END), 0) AS resolved_prev
+                 FROM department_stats s
+                 LEFT JOIN department_stats_daily d
+                        ON d.department = s.department AND d.day > date('now', ?)
+                 WHERE s.total > 0
+                 GROUP BY s.department''',
+              (f"-{TREND_WINDOW_DAYS} days", f"-{TREND_WINDOW_DAYS} days", f"-{2 * TREND_WINDOW_DAYS} days"))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
 def init_db():
+    """Creates/migrates the schema. Called once at app startup, not on import."""
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
+
+    # Already current: one PRAGMA read instead of the full set of checks
+    c.execute("PRAGMA user_version")
+    version = c.fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        conn.close()
+        return
     
     # 1. Users Table
     c.execute('''CREATE TABLE IF NOT EXISTS users (
@@ -158,7 +423,8 @@ def init_db():
                     lon REAL,
                     skills TEXT,
                     avatar TEXT, 
-                    status TEXT
+                    status TEXT,
+                    feed_built_at DATETIME
                 )''')
 
     # 2. Issues Table
@@ -181,7 +447,9 @@ def init_db():
                     fairness_score REAL,
                     disagreement_rate REAL,
                     financial_relief TEXT,
-                    image_url TEXT
+                    image_url TEXT,
+                    comment_count INTEGER DEFAULT 0,
+                    status_updated_at DATETIME
                 )''')
 
     # 3. Comments Table
@@ -194,48 +462,100 @@ def init_db():
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY(issue_id) REFERENCES issues(id)
                 )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_comments_issue_ts ON comments(issue_id, timestamp DESC, id DESC)")
+
+    # 4. Status History (append-only audit of lifecycle transitions)
+    c.execute('''CREATE TABLE IF NOT EXISTS status_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    issue_id INTEGER,
+                    from_status TEXT,
+                    to_status TEXT,
+                    changed_by TEXT,
+                    note TEXT,
+                    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(issue_id) REFERENCES issues(id)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_status_history_issue ON status_history(issue_id, id)")
+
+    # 5. Department Stats (materialized, kept current by triggers on issues)
+    # Version 3 added the delete trigger and the daily-bucket backfill; 4 the archived counts;
+    # 5 resolved buckets for rows inserted already resolved (imports)
+    if 0 < version < 5:
+        c.execute("DROP TRIGGER IF EXISTS trg_department_stats_insert")
+    init_department_stats(c, rebuild=0 < version < 3)
+
+    # 6. Volunteer Feeds (materialized by feeds.py; one row per volunteer x issue)
+    # Integer-only and WITHOUT ROWID: the row lives in the primary-key b-tree,
+    # so a volunteer's feed is one contiguous range read.
+    c.execute('''CREATE TABLE IF NOT EXISTS volunteer_feeds (
+                    user_id INTEGER NOT NULL,
+                    issue_id INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    dist_m INTEGER NOT NULL,
+                    skill_match INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, issue_id)
+                ) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_volunteer_feeds_issue ON volunteer_feeds(issue_id)")
+
+    c.execute("PRAGMA table_info(users)")
+    if 'feed_built_at' not in [info[1] for info in c.fetchall()]:
+        log.info("Migrating DB: Adding %s column...", "users.feed_built_at")
+        c.execute("ALTER TABLE users ADD COLUMN feed_built_at DATETIME")
     
     # Check for ai_analysis column in existing table and add if missing
     c.execute("PRAGMA table_info(issues)")
     columns = [info[1] for info in c.fetchall()]
     if 'ai_analysis' not in columns:
-        print("Migrating DB: Adding ai_analysis column...")
+        log.info("Migrating DB: Adding %s column...", "ai_analysis")
         c.execute("ALTER TABLE issues ADD COLUMN ai_analysis TEXT")
     
     if 'reported_by' not in columns:
-        print("Migrating DB: Adding reported_by column...")
+        log.info("Migrating DB: Adding %s column...", "reported_by")
         c.execute("ALTER TABLE issues ADD COLUMN reported_by TEXT DEFAULT 'Civic Citizen'")
 
     if 'department' not in columns:
-        print("Migrating DB: Adding department column...")
+        log.info("Migrating DB: Adding %s column...", "department")
         c.execute("ALTER TABLE issues ADD COLUMN department TEXT DEFAULT 'General'")
         
     if 'ai_confidence' not in columns:
-        print("Migrating DB: Adding ai_confidence column...")
+        log.info("Migrating DB: Adding %s column...", "ai_confidence")
         c.execute("ALTER TABLE issues ADD COLUMN ai_confidence REAL")
         
     if 'opik_trace_id' not in columns:
-        print("Migrating DB: Adding opik_trace_id column...")
+        log.info("Migrating DB: Adding %s column...", "opik_trace_id")
         c.execute("ALTER TABLE issues ADD COLUMN opik_trace_id TEXT")
 
     if 'image_url' not in columns:
-        print("Migrating DB: Adding image_url column...")
+        log.info("Migrating DB: Adding %s column...", "image_url")
         c.execute("ALTER TABLE issues ADD COLUMN image_url TEXT")
 
     if 'department' not in columns:
-        print("Migrating DB: Adding department column...")
+        log.info("Migrating DB: Adding %s column...", "department")
         c.execute("ALTER TABLE issues ADD COLUMN department TEXT DEFAULT 'General'")
 
+    if 'status_updated_at' not in columns:
+        log.info("Migrating DB: Adding %s column...", "status_updated_at")
+        c.execute("ALTER TABLE issues ADD COLUMN status_updated_at DATETIME")
+
+    # Hot-path index covers open work only; resolved/archived history stays out of it
+    c.execute("CREATE INDEX IF NOT EXISTS idx_issues_open ON issues(id DESC) WHERE status='Open'")
+
+    if 'comment_count' not in columns:
+        log.info("Migrating DB: Adding %s column...", "comment_count")
+        c.execute("ALTER TABLE issues ADD COLUMN comment_count INTEGER DEFAULT 0")
+        c.execute("UPDATE issues SET comment_count = (SELECT count(*) FROM comments WHERE comments.issue_id = issues.id)")
+        conn.commit()
+
     c.execute('SELECT count(*) FROM users')
     if c.fetchone()[0] == 0:
-        print("⚡ Injecting GOLDEN DATASET (Volunteers)...")
+        log.info("⚡ Injecting GOLDEN DATASET (Volunteers)...")
         for u in DEMO_VOLUNTEERS:
             c.execute('INSERT INTO users (name, phone, lat, lon, skills, avatar, status) VALUES (?,?,?,?,?,?,?)', 
                       (u['name'], u['phone'], u['lat'], u['lon'], json.dumps(u['skills']), u['avatar'], "Active"))
 
     c.execute('SELECT count(*) FROM issues')
     if c.fetchone()[0] == 0:
-        print("Injecting GOLDEN DATASET (Issues)...")
+        log.info("Injecting GOLDEN DATASET (Issues)...")
         for i in DEMO_ISSUES:
             c.execute('''INSERT INTO issues (title, category, description, lat, lon, tags, severity, avatar, ai_analysis, department)
                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
@@ -245,8 +565,11 @@ def init_db():
         
         conn.commit()
 
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
     conn.close()
 
+@timed(DB_QUERY_SECONDS)
 def get_nearby_volunteers(required_skill, lat, lon, radius_km=10):
     conn = sqlite3.connect(DB_NAME)
     conn.row_factory = sqlite3.Row
@@ -262,47 +585,202 @@ def get_nearby_volunteers(required_skill, lat, lon, radius_km=10):
     matches.sort(key=lambda x: x['dist_km'])
     return matches[:10]
 
-def save_issue_to_db(issue_data):
+# --- VOLUNTEER PROFILES & MATERIALIZED FEEDS ---
+VOLUNTEER_COLUMNS = ("id", "name", "phone", "lat", "lon", "skills", "avatar", "status")
+
+@timed(DB_QUERY_SECONDS)
+def get_volunteer_rows():
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(f"SELECT {', '.join(VOLUNTEER_COLUMNS)} FROM users").fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+@timed(DB_QUERY_SECONDS)
+def get_volunteer(user_id):
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(f"SELECT {', '.join(VOLUNTEER_COLUMNS)}, feed_built_at FROM users WHERE id=?", (user_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+@timed(DB_QUERY_SECONDS)
+def save_volunteer(profile):
+    """Inserts a profile, or updates it when profile['id'] exists. Returns the id."""
+    values = (profile['name'], profile.get('phone'), profile['lat'], profile['lon'],
+              json.dumps(profile.get('skills', [])), profile.get('avatar'), profile.get('status', 'Active'))
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
-    avatar = "https://cdn-icons-png.flaticon.com/512/7542/7542190.png"
-    
-    # Check if table has ai_analysis column (for robustness)
-    c.execute("PRAGMA table_info(issues)")
-    
+    user_id = profile.get('id')
+    if user_id is not None:
+        # Location/skills may have changed: the feed is rebuilt by the materializer
+        c.execute('''UPDATE users SET name=?, phone=?, lat=?, lon=?, skills=?, avatar=?, status=?, feed_built_at=NULL
+                     WHERE id=?''', (*values, user_id))
+    if user_id is None or c.rowcount == 0:
+        c.execute('''INSERT INTO users (name, phone, lat, lon, skills, avatar, status, id)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', (*values, user_id))
+        user_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return user_id
+
+@timed(DB_QUERY_SECONDS)
+def push_feed_entries(entries, trim_user_ids=(), max_items=100):
+    """
+    entries: (user_id, issue_id, score, dist_m, skill_match) rows, upserted in one
+    transaction. Feeds in trim_user_ids are cut back to their max_items best rows.
+    Returns {user_id: lowest score kept} for the trimmed feeds.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.executemany("INSERT OR REPLACE INTO volunteer_feeds VALUES (?, ?, ?, ?, ?)", entries)
+    floors = {}
+    for user_id in trim_user_ids:
+        c.execute('''DELETE FROM volunteer_feeds WHERE user_id=? AND issue_id IN (
+                         SELECT issue_id FROM volunteer_feeds WHERE user_id=?
+                         ORDER BY score DESC, issue_id DESC LIMIT -1 OFFSET ?)''', (user_id, user_id, max_items))
+        c.execute("SELECT min(score) FROM volunteer_feeds WHERE user_id=?", (user_id,))
+        floors[user_id] = c.fetchone()[0] or 0
+    conn.commit()
+    conn.close()
+    return floors
+
+@timed(DB_QUERY_SECONDS)
+def replace_volunteer_feed(user_id, entries):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("DELETE FROM volunteer_feeds WHERE user_id=?", (user_id,))
+    c.executemany("INSERT INTO volunteer_feeds VALUES (?, ?, ?, ?, ?)", entries)
+    c.execute("UPDATE users SET feed_built_at=CURRENT_TIMESTAMP WHERE id=?", (user_id,))
+    conn.commit()
+    conn.close()
+
+@timed(DB_QUERY_SECONDS)
+def drop_feed_issue(issue_id):
+    """Removes an issue from every feed; returns the user ids whose feed held it."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("SELECT user_id FROM volunteer_feeds WHERE issue_id=?", (issue_id,))
+    user_ids = [row[0] for row in c.fetchall()]
+    c.execute("DELETE FROM volunteer_feeds WHERE issue_id=?", (issue_id,))
+    conn.commit()
+    conn.close()
+    return user_ids
+
+@timed(DB_QUERY_SECONDS)
+def get_built_feed_stats():
+    """{user_id: (entries, lowest score)} for every volunteer whose feed has been built."""
+    conn = sqlite3.connect(DB_NAME)
+    rows = conn.execute('''SELECT u.id, count(f.issue_id), min(f.score) FROM users u
+                            LEFT JOIN volunteer_feeds f ON f.user_id = u.id
+                            WHERE u.feed_built_at IS NOT NULL GROUP BY u.id''').fetchall()
+    conn.close()
+    return {user_id: (count, floor or 0) for user_id, count, floor in rows}
+
+@timed(DB_QUERY_SECONDS)
+def get_materialized_feed(user_id, limit=100):
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute('''SELECT f.issue_id, f.score, f.dist_m, f.skill_match, i.title, i.category, i.description,
+                                   i.severity, i.avatar, i.reported_by, i.department, i.image_url
+                            FROM volunteer_feeds f JOIN issues i ON i.id = f.issue_id
+                            WHERE f.user_id=? AND i.status='Open'
+                            ORDER BY f.score DESC, f.issue_id DESC LIMIT ?''', (user_id, limit)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+@timed(DB_QUERY_SECONDS)
+def get_open_issues_near(lat, lon, radius_km):
+    """
+    (id, category, tags, severity, lat, lon) tuples for open issues in the bounding
+    box of the circle; callers filter by exact distance. Not a spatial lookup: it
+    walks every open issue (idx_issues_open) and checks lat/lon row by row. A
+    (lat, lon) index measured slower: a 10 km box covers most of a city, so the
+    index only adds random row lookups. Tuples: this feeds full-feed rebuilds,
+    which walk thousands of rows.
+    """
+    reach = radius_km / 111
+    conn = sqlite3.connect(DB_NAME)
+    rows = conn.execute('''SELECT id, category, tags, severity, lat, lon FROM issues
+                            WHERE status='Open' AND lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?''',
+                        (lat - reach, lat + reach, lon - reach, lon + reach)).fetchall()
+    conn.close()
+    return rows
+
+@timed(DB_QUERY_SECONDS)
+def get_open_issue_points():
+    """(id, lat, lon, severity) tuples for every open issue with a location (map clusters)."""
+    conn = sqlite3.connect(DB_NAME)
+    rows = conn.execute("""SELECT id, lat, lon, severity FROM issues
+                           WHERE status='Open' AND lat IS NOT NULL AND lon IS NOT NULL""").fetchall()
+    conn.close()
+    return rows
+
+INSERT_ISSUE_SQL = '''INSERT INTO issues 
+                 (title, category, description, lat, lon, tags, severity, status, 
+                  ai_analysis, reported_by, department, ai_confidence, opik_trace_id,
+                  fairness_score, disagreement_rate, financial_relief, image_url, status_updated_at, avatar)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+def _issue_values(issue_data):
+    """issue dict -> parameters for INSERT_ISSUE_SQL (shared by single and bulk inserts)."""
     if 'opik_trace_id' not in issue_data:
         # Generate a trace ID if one wasn't passed from the agent
         import uuid
         issue_data['opik_trace_id'] = str(uuid.uuid4())
 
-    c.execute('''INSERT INTO issues 
-                 (title, category, description, lat, lon, tags, severity, status, 
-                  ai_analysis, reported_by, department, ai_confidence, opik_trace_id,
-                  fairness_score, disagreement_rate, financial_relief)
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-              (issue_data['title'], 
-               issue_data['category'], 
-               issue_data['description'], 
-               issue_data['lat'], 
-               issue_data['lon'], 
-               json.dumps(issue_data.get('tags', [])),
-               issue_data.get('severity', 5), 
-               'Open',
-               issue_data.get('ai_analysis'),
-               issue_data.get('reported_by', 'Civic Citizen'),
-               issue_data.get('department', 'General'),
-               issue_data.get('ai_confidence', 0.95),
-               issue_data.get('opik_trace_id'),
-               issue_data.get('fairness_score', 90),
-               issue_data.get('disagreement_rate', 0),
-               issue_data.get('financial_relief', 'None')
-               ))
-                   
+    return (issue_data['title'], 
+            issue_data['category'], 
+            issue_data['description'], 
+            issue_data['lat'], 
+            issue_data['lon'], 
+            json.dumps(issue_data.get('tags', [])),
+            issue_data.get('severity', 5), 
+            issue_data.get('status') or 'Open', # Set by imports only; new issues start Open
+            issue_data.get('ai_analysis'),
+            issue_data.get('reported_by', 'Civic Citizen'),
+            issue_data.get('department', 'General'),
+            issue_data.get('ai_confidence', 0.95),
+            issue_data.get('opik_trace_id'),
+            issue_data.get('fairness_score', 90),
+            issue_data.get('disagreement_rate', 0),
+            issue_data.get('financial_relief', 'None'),
+            issue_data.get('image_url'),
+            issue_data.get('status_updated_at'),
+            issue_data.get('avatar'))
+
+@timed(DB_QUERY_SECONDS)
+def save_issue_to_db(issue_data):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(INSERT_ISSUE_SQL, _issue_values(issue_data))
     issue_id = c.lastrowid
     conn.commit()
     conn.close()
     return issue_id
 
+@timed(DB_QUERY_SECONDS)
+def save_issues_batch(issues):
+    """
+    Inserts many issues in ONE transaction. Returns a list aligned with issues:
+    the new id, or the error string for a row SQLite rejected (the rest still commit).
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    results = []
+    try:
+        for issue_data in issues:
+            try:
+                c.execute(INSERT_ISSUE_SQL, _issue_values(issue_data))
+                results.append(c.lastrowid)
+            except (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError) as e:
+                results.append(str(e))
+        conn.commit()
+    finally:
+        conn.close()
+    return results
+
+@timed(DB_QUERY_SECONDS)
 def get_open_issues():
     conn = sqlite3.connect(DB_NAME)
     conn.row_factory = sqlite3.Row
@@ -311,5 +789,3 @@ def get_open_issues():
     rows = c.fetchall()
     conn.close()
     return [dict(row) for row in rows]
-
-init_db()
\ No newline at end of file
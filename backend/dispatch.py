@@ -0,0 +1,129 @@
+import heapq
+import time
+import uuid
+
+try:
+    from backend.ai_agent import match_volunteers_agent
+    from backend.volunteer_index import VOLUNTEER_INDEX, skills_for_tags
+    from backend.issue_cache import LRUCache
+    from backend.jobs import DISPATCH_QUEUE
+    from backend.log_config import get_logger
+except ImportError:
+    from ai_agent import match_volunteers_agent
+    from volunteer_index import VOLUNTEER_INDEX, skills_for_tags
+    from issue_cache import LRUCache
+    from jobs import DISPATCH_QUEUE
+    from log_config import get_logger
+
+log = get_logger("dispatch")
+
+# --- VOLUNTEER DISPATCH ---
+# Ranking is local and immediate: Active volunteers within the radius (spatial
+# index), skill matches first (skill index), then distance. The LLM never sits
+# on the critical path; it only gets the short list afterwards, on its own job
+# queue (DISPATCH_QUEUE), to write a natural-language reason per pick. Clients
+# poll GET /dispatch/{id} for those reasons.
+DISPATCH_RADIUS_KM = 10
+DISPATCH_CANDIDATES = 5
+MAX_DISPATCH_CANDIDATES = 20
+
+SKILL_POINTS = 60
+DISTANCE_POINTS = 40
+
+AVAILABLE_STATUS = "Active"
+
+DISPATCHES = LRUCache(1000)  # dispatch_id -> record
+
+
+def rank_volunteers(lat, lon, skills, radius_km=DISPATCH_RADIUS_KM, limit=DISPATCH_CANDIDATES):
+    """Best `limit` available volunteers for a job at (lat, lon) needing any of `skills` (lowercase)."""
+    skills = set(skills)
+    skilled = VOLUNTEER_INDEX.with_skills(skills) if skills else set()
+    ranked = []
+    for profile, dist in VOLUNTEER_INDEX.within(lat, lon, radius_km):
+        if profile.get('status') != AVAILABLE_STATUS:
+            continue
+        matched = profile['id'] in skilled
+        score = DISTANCE_POINTS * max(0.0, 1 - dist / radius_km) + (SKILL_POINTS if matched else 0)
+        ranked.append((round(score), -dist, profile, matched))
+    best = heapq.nlargest(limit, ranked, key=lambda r: (r[0], r[1]))
+
+    candidates = []
+    for score, neg_dist, profile, matched in best:
+        dist = round(-neg_dist, 1)
+        matched_names = [s for s in profile['skill_names'] if s.lower() in skills]
+        candidates.append({
+            "id": profile['id'],
+            "name": profile['name'],
+            "phone": profile.get('phone'),
+            "avatar": profile.get('avatar'),
+            "skills": list(profile['skill_names']),
+            "dist_km": dist,
+            "match_score": score,
+            "skill_match": matched,
+            "reason": f"{', '.join(matched_names)} skills, {dist} km away" if matched else f"{dist} km away",
+            "ai_reason": None,
+        })
+    return candidates
+
+
+def explain_candidates(description, candidates):
+    """Job: asks the matcher agent to justify the local short list. Returns {volunteer id: reason}."""
+    brief = [{"name": c['name'], "skills": c['skills'], "dist_km": c['dist_km']} for c in candidates]
+    result = match_volunteers_agent(description, brief)
+    ids_by_name = {}
+    for c in candidates:
+        ids_by_name.setdefault(c['name'], c['id'])
+    reasons = {}
+    for match in result.get("ranked_matches", []) if isinstance(result, dict) else []:
+        if isinstance(match, dict) and match.get('name') in ids_by_name and match.get('reason'):
+            reasons[ids_by_name[match['name']]] = str(match['reason'])
+    return {"reasons": reasons}
+
+
+def create_dispatch(description, lat, lon, skills, radius_km=DISPATCH_RADIUS_KM, limit=DISPATCH_CANDIDATES, issue_id=None):
+    started = time.perf_counter()
+    candidates = rank_volunteers(lat, lon, skills, radius_km, limit)
+    dispatch_id = uuid.uuid4().hex
+    record = {
+        "dispatch_id": dispatch_id,
+        "issue_id": issue_id,
+        "candidates": candidates,
+        "job_id": None,
+        "reasons": "none",
+        "created_at": time.time(),
+    }
+    if candidates:
+        job = DISPATCH_QUEUE.submit("dispatch_reasons", explain_candidates, description, candidates)
+        record['job_id'] = job['id']
+    DISPATCHES.put(dispatch_id, record)
+    log.info("🚑 Dispatch %s ranked %d volunteers in %.1f ms", dispatch_id, len(candidates),
+             (time.perf_counter() - started) * 1000, extra={"issue_id": issue_id})
+    return dispatch_view(record)
+
+
+def dispatch_view(record):
+    """Record + current state of its reasons job -> response payload."""
+    if record['job_id'] and record['reasons'] not in ("done", "failed"):
+        job = DISPATCH_QUEUE.get(record['job_id'])
+        record['reasons'] = job['status'] if job else "expired"
+        if job and job['status'] == "done":
+            # Copied into the record: the job queue only keeps recent finished jobs
+            ai_reasons = job['result']['reasons']
+            record['candidates'] = [{**c, "ai_reason": ai_reasons.get(c['id'])} for c in record['candidates']]
+    return {
+        "dispatch_id": record['dispatch_id'],
+        "issue_id": record['issue_id'],
+        "candidates": record['candidates'],
+        "reasons": record['reasons'],  # none | queued | running | done | failed | expired
+    }
+
+
+def get_dispatch(dispatch_id):
+    record = DISPATCHES.get(dispatch_id)
+    return dispatch_view(record) if record else None
+
+
+def skills_for_issue(tags, extra=""):
+    """Issue tags plus explicitly requested skills -> lowercase skill set."""
+    return skills_for_tags(tags) | set(s.strip().lower() for s in extra.split(",") if s.strip())
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+log = get_logger("events")
+
+# --- REAL-TIME EVENT HUB ---
+# In-process pub/sub that fans events out to WebSocket/SSE subscribers.
+# Each subscriber has a bounded buffer; a consumer that falls behind is dropped
+# rather than slowing down publishers or growing memory.
+EVENT_ISSUE_CREATED = "issue.created"
+EVENT_STATUS_CHANGED = "issue.status_changed"
+EVENT_COMMENT_ADDED = "comment.added"
+EVENT_TYPES = (EVENT_ISSUE_CREATED, EVENT_STATUS_CHANGED, EVENT_COMMENT_ADDED)
+
+SUBSCRIBER_BUFFER = 100
+HEARTBEAT_SECONDS = 15
+
+
+def _dist_km(lat1, lon1, lat2, lon2):
+    # Same flat-earth approximation as get_nearby_volunteers; fine at city scale
+    return ((lat1 - lat2) ** 2 + (lon1 - lon2) ** 2) ** 0.5 * 111
+
+
+class Subscription:
+    def __init__(self, topics=None, lat=None, lon=None, radius_km=None, issue_id=None, max_buffer=SUBSCRIBER_BUFFER):
+        self.topics = set(topics or EVENT_TYPES)
+        self.lat = lat
+        self.lon = lon
+        self.radius_km = radius_km
+        self.issue_id = issue_id
+        self.queue = asyncio.Queue(maxsize=max_buffer)
+        self.dropped = False
+
+    def matches(self, event):
+        if event['type'] not in self.topics:
+            return False
+        data = event['data']
+        if self.issue_id is not None and data.get('issue_id', data.get('id')) != self.issue_id:
+            return False
+        if self.radius_km is not None and self.lat is not None and self.lon is not None:
+            if data.get('lat') is None or data.get('lon') is None:
+                return False
+            if _dist_km(self.lat, self.lon, data['lat'], data['lon']) > self.radius_km:
+                return False
+        return True
+
+    async def next_event(self, timeout=HEARTBEAT_SECONDS):
+        """Next event, None on heartbeat timeout. Raises ConnectionAbortedError once dropped."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            event = None
+        if self.dropped:
+            raise ConnectionAbortedError("subscriber too slow")
+        return event
+
+
+class EventHub:
+    def __init__(self):
+        self._subscribers = set()
+
+    def subscribe(self, **filters):
+        sub = Subscription(**filters)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self._subscribers.discard(sub)
+
+    def publish(self, event_type, data):
+        """Non-blocking fan-out. Must be called from the event loop thread."""
+        event = {"type": event_type, "data": data, "ts": time.time()}
+        for sub in list(self._subscribers):
+            if not sub.matches(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it and wake its reader so the connection closes
+                log.warning("⚠️ Dropping slow event subscriber (%d buffered)", sub.queue.qsize())
+                sub.dropped = True
+                self.unsubscribe(sub)
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+def parse_topics(topics):
+    if not topics:
+        return None
+    return [t.strip() for t in topics.split(",") if t.strip() in EVENT_TYPES]
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+EVENT_HUB = EventHub()
@@ -0,0 +1,241 @@
+import functools
+import heapq
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+try:
+    from backend.database import (push_feed_entries, replace_volunteer_feed, drop_feed_issue,
+                                  get_open_issues_near, get_issue_fields, get_built_feed_stats)
+    from backend.volunteer_index import VOLUNTEER_INDEX, dist_km, skills_for_tags
+    from backend.log_config import get_logger
+except ImportError:
+    from database import (push_feed_entries, replace_volunteer_feed, drop_feed_issue,
+                          get_open_issues_near, get_issue_fields, get_built_feed_stats)
+    from volunteer_index import VOLUNTEER_INDEX, dist_km, skills_for_tags
+    from log_config import get_logger
+
+log = get_logger("feeds")
+
+# --- VOLUNTEER FEED MATERIALIZER ---
+# Feeds are precomputed rows in volunteer_feeds, so /my_feed?user_id= is a
+# single primary-key range read. Writes happen here, on one background thread
+# (the publish request never waits, and feed writes never race each other):
+# - issue published: volunteers within FEED_RADIUS_KM (spatial index) get a
+#   scored entry, skill matches (skill index) ranked higher;
+# - issue closed: its entries are dropped; reopened: pushed again;
+# - profile created/updated: that volunteer's feed is rebuilt from open issues.
+# Scoring mirrors the old AI ranker's rules: volunteer issues match on skills
+# and distance, government issues on distance only.
+#
+# To keep write transactions short (publish writes on the event loop would
+# otherwise wait on the feed writer's lock), the writer tracks each built feed's
+# size and lowest kept score: entries that cannot make a full feed are never
+# written, and a feed is trimmed only once it overshoots by TRIM_SLACK. Feeds
+# that were never built get nothing; their first read builds them from the DB.
+FEED_RADIUS_KM = 10
+FEED_MAX_ITEMS = 100
+TRIM_SLACK = 20
+
+SKILL_POINTS = 40
+DISTANCE_POINTS = 40
+SEVERITY_POINTS = 2  # per severity level (1-10)
+
+MAX_PUSH_BATCH = 50  # published issues applied per transaction
+PRIORITY_REBUILD, PRIORITY_UPDATE = 0, 1
+
+
+def score_entry(severity, dist, skill_match):
+    """0-100: skill match, then closeness, then severity."""
+    score = DISTANCE_POINTS * max(0.0, 1 - dist / FEED_RADIUS_KM)
+    score += SEVERITY_POINTS * min(max(int(severity or 0), 0), 10)
+    if skill_match:
+        score += SKILL_POINTS
+    return int(round(score))
+
+
+@functools.lru_cache(maxsize=4096)
+def _tag_skills(tags_json):
+    # Stored tags strings repeat heavily (templates, common tag sets): parse each once
+    return frozenset(skills_for_tags(tags_json))
+
+
+def _entries_for_issue(issue_id, issue):
+    wanted = skills_for_tags(issue.get('tags')) if issue.get('category') == 'VOLUNTEER' else set()
+    skilled = VOLUNTEER_INDEX.with_skills(wanted) if wanted else set()
+    entries = []
+    for profile, dist in VOLUNTEER_INDEX.within(issue['lat'], issue['lon'], FEED_RADIUS_KM):
+        skill_match = profile['id'] in skilled
+        entries.append((profile['id'], issue_id, score_entry(issue.get('severity'), dist, skill_match),
+                        int(dist * 1000), int(skill_match)))
+    return entries
+
+
+def _entries_for_volunteer(profile):
+    user_id, lat, lon, skills = profile['id'], profile['lat'], profile['lon'], set(profile['skills'])
+    entries = []
+    for issue_id, category, tags, severity, issue_lat, issue_lon in get_open_issues_near(lat, lon, FEED_RADIUS_KM):
+        dist = dist_km(lat, lon, issue_lat, issue_lon)
+        if dist > FEED_RADIUS_KM:
+            continue
+        skill_match = bool(skills) and category == 'VOLUNTEER' and not skills.isdisjoint(_tag_skills(tags))
+        entries.append((user_id, issue_id, score_entry(severity, dist, skill_match), int(dist * 1000), int(skill_match)))
+    return heapq.nlargest(FEED_MAX_ITEMS, entries, key=lambda e: (e[2], e[1]))
+
+
+class FeedMaterializer:
+    """
+    Single writer thread. Queued rebuilds run before queued issue updates: a
+    volunteer may be waiting on a rebuild, and since the issue rows are already
+    committed when work is queued, the order between the two does not matter.
+    Issue updates keep their order; runs of queued pushes share one transaction.
+    """
+    def __init__(self, max_batch=MAX_PUSH_BATCH):
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._max_batch = max_batch
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._building = {}  # user_id -> Future of a queued/running rebuild
+        self._feeds = None   # user_id -> [entries, lowest score]; built feeds only, writer thread only
+
+    def _submit(self, priority, kind, *args):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((priority, next(self._seq), kind, args, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="civicflow-feeds", daemon=True)
+                self._thread.start()
+
+    def issue_published(self, issue_id, issue):
+        """issue: dict with category, tags, severity, lat, lon. Returns a Future (feeds touched)."""
+        return self._submit(PRIORITY_UPDATE, "push", issue_id, issue)
+
+    def issue_status_changed(self, issue_id, status):
+        if status == 'Open':
+            return self._submit(PRIORITY_UPDATE, "repush", issue_id)
+        return self._submit(PRIORITY_UPDATE, "drop", issue_id)
+
+    def rebuild(self, user_id):
+        """Queues a full rebuild of one feed; concurrent calls share the same Future."""
+        with self._lock:
+            future = self._building.get(user_id)
+            if future is None or future.done():
+                future = self._building[user_id] = self._submit(PRIORITY_REBUILD, "rebuild", user_id)
+        return future
+
+    def flush(self):
+        """Blocks until everything queued so far has been applied (tests, benchmarks)."""
+        self._submit(PRIORITY_UPDATE, "noop").result()
+
+    def _loop(self):
+        carry = None
+        while True:
+            item = carry or self._queue.get()
+            carry = None
+            if item[2] != "push":
+                self._run(item)
+                continue
+            pushes = [item]
+            # Coalesce the run of pushes already waiting behind this one
+            while len(pushes) < self._max_batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt[2] != "push":
+                    carry = nxt
+                    break
+                pushes.append(nxt)
+            self._push(pushes)
+
+    def _run(self, item):
+        _, _, kind, args, future = item
+        try:
+            if kind == "rebuild":
+                result = self._rebuild(*args)
+            elif kind == "repush":
+                issue = get_issue_fields(args[0], ("category", "tags", "severity", "lat", "lon"))
+                result = self._push([(None, None, "push", (args[0], issue), None)]) if issue else 0
+            elif kind == "drop":
+                result = self._drop(*args)
+            else:
+                result = None
+        except Exception as e:
+            log.exception("Feed materialization failed: %s%s", kind, args)
+            future.set_exception(e)
+            return
+        future.set_result(result)
+
+    def _built_feeds(self):
+        if self._feeds is None:
+            self._feeds = {user_id: [count, floor] for user_id, (count, floor) in get_built_feed_stats().items()}
+        return self._feeds
+
+    def _push(self, pushes):
+        """Applies a run of published issues in one transaction; resolves each push's Future."""
+        try:
+            feeds = self._built_feeds()
+            entries, counts, trim = [], [], set()
+            for _, _, _, (issue_id, issue), _ in pushes:
+                count = 0
+                for entry in _entries_for_issue(issue_id, issue):
+                    state = feeds.get(entry[0])
+                    if state is None or (state[0] >= FEED_MAX_ITEMS and entry[2] < state[1]):
+                        continue  # Not built yet, or would not make the cut
+                    entries.append(entry)
+                    state[0] += 1
+                    if state[0] > FEED_MAX_ITEMS + TRIM_SLACK:
+                        trim.add(entry[0])
+                    count += 1
+                counts.append(count)
+            if entries:
+                for user_id, floor in push_feed_entries(entries, trim, FEED_MAX_ITEMS).items():
+                    feeds[user_id] = [FEED_MAX_ITEMS, floor]
+        except Exception as e:
+            log.exception("Feed push of %d issues failed", len(pushes))
+            self._feeds = None  # Counts may be off now: reload on the next push
+            for *_, future in pushes:
+                if future is not None:
+                    future.set_exception(e)
+            return 0
+        log.debug("Pushed %d issues as %d feed entries (%d feeds trimmed)", len(pushes), len(entries), len(trim))
+        for (*_, future), count in zip(pushes, counts):
+            if future is not None:
+                future.set_result(count)
+        return sum(counts)
+
+    def _drop(self, issue_id):
+        user_ids = drop_feed_issue(issue_id)
+        feeds = self._built_feeds()
+        for user_id in user_ids:
+            state = feeds.get(user_id)
+            if state is None:
+                continue
+            state[0] -= 1
+            if state[0] == FEED_MAX_ITEMS // 2 - 1:
+                # Entries skipped while the feed was full are gone: refill from the DB
+                self.rebuild(user_id)
+        return len(user_ids)
+
+    def _rebuild(self, user_id):
+        profile = VOLUNTEER_INDEX.get(user_id)
+        if profile is None or profile.get('lat') is None or profile.get('lon') is None:
+            return 0
+        entries = _entries_for_volunteer(profile)
+        replace_volunteer_feed(user_id, entries)
+        if self._feeds is not None:
+            self._feeds[user_id] = [len(entries), entries[-1][2] if entries else 0]
+        log.debug("Feed for volunteer %s rebuilt with %d entries", user_id, len(entries))
+        return len(entries)
+
+
+FEED_MATERIALIZER = FeedMaterializer()
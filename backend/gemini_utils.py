@@ -1,18 +1,57 @@
-import google.generativeai as genai
 import os
+import threading
 import time
 
-# Configure API Key (Run once on import if env var exists)
-api_key = os.environ.get("GOOGLE_API_KEY")
-if api_key:
-    genai.configure(api_key=api_key)
+try:
+    from backend.metrics import AI_MODEL_SECONDS, AI_FALLBACK_DEPTH, AI_PROMPT_CHARS, AI_RESPONSE_CHARS, AI_TOKENS
+    from backend.log_config import get_logger
+except ImportError:
+    from metrics import AI_MODEL_SECONDS, AI_FALLBACK_DEPTH, AI_PROMPT_CHARS, AI_RESPONSE_CHARS, AI_TOKENS
+    from log_config import get_logger
+
+log = get_logger("gemini_utils")
+
+# The SDK takes most of a second to import: load and configure it on first use
+_genai = None
+_genai_lock = threading.Lock()
 
 # Global model instances for reuse
 _primary_model = None
 _fallback_model = None
 
+# Benchmarks/tests swap in a local fake with set_model_factory(lambda name: FakeModel(name))
+_model_factory = None
+RETRY_PAUSE_SECONDS = 1
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                try:
+                    from backend.startup import load_env
+                except ImportError:
+                    from startup import load_env
+                load_env()
+                import google.generativeai as genai
+                # Configure API Key (once, if env var exists)
+                api_key = os.environ.get("GOOGLE_API_KEY")
+                if api_key:
+                    genai.configure(api_key=api_key)
+                else:
+                    log.warning("⚠️ WARNING: GOOGLE_API_KEY not found.")
+                _genai = genai
+    return _genai
+
+def set_model_factory(factory):
+    """factory(model_name) -> object with generate_content(); None restores Gemini."""
+    global _model_factory
+    _model_factory = factory
+
 def get_model(model_name):
-    return genai.GenerativeModel(model_name)
+    if _model_factory is not None:
+        return _model_factory(model_name)
+    return get_genai().GenerativeModel(model_name)
 
 def generate_with_fallback(prompt, image_payload=None, system_instruction=None):
     """
@@ -27,10 +66,12 @@ def generate_with_fallback(prompt, image_payload=None, system_instruction=None):
     models_to_try = ['gemini-3','gemini-2.5-pro', 'gemini-2.5-flash', 'gemini-2.5-flash-lite',]
     
     last_error = None
+    AI_PROMPT_CHARS.observe(len(prompt))
 
-    for model_name in models_to_try:
+    for depth, model_name in enumerate(models_to_try):
+        started = time.perf_counter()
         try:
-            print(f"🤖 AI Attempt: Using {model_name}...")
+            log.debug("🤖 AI Attempt: Using %s...", model_name)
             model = get_model(model_name)
             
             if image_payload:
@@ -39,14 +80,24 @@ def generate_with_fallback(prompt, image_payload=None, system_instruction=None):
             else:
                 response = model.generate_content(prompt)
                 
-            return response.text
+            text = response.text
+            AI_MODEL_SECONDS.observe(time.perf_counter() - started, model_name, "ok")
+            AI_FALLBACK_DEPTH.observe(depth)
+            AI_RESPONSE_CHARS.observe(len(text), model_name)
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None:
+                AI_TOKENS.inc(model_name, "prompt", amount=getattr(usage, "prompt_token_count", 0) or 0)
+                AI_TOKENS.inc(model_name, "response", amount=getattr(usage, "candidates_token_count", 0) or 0)
+            return text
             
         except Exception as e:
-            print(f"⚠️ Model {model_name} failed: {e}")
+            AI_MODEL_SECONDS.observe(time.perf_counter() - started, model_name, "error")
+            log.warning("⚠️ Model %s failed: %s", model_name, e)
             last_error = e
-            time.sleep(1) # Brief pause before retry
+            time.sleep(RETRY_PAUSE_SECONDS) # Brief pause before retry
             continue
             
     # If all fail
-    print("❌ All AI models failed.")
+    AI_FALLBACK_DEPTH.observe(len(models_to_try))
+    log.error("❌ All AI models failed.")
     raise last_error or Exception("All models failed")
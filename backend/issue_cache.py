@@ -0,0 +1,108 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    from backend.database import get_issue_by_id
+    from backend.archive import get_archived_issue
+    from backend.metrics import CACHE_REQUESTS
+except ImportError:
+    from database import get_issue_by_id
+    from archive import get_archived_issue
+    from metrics import CACHE_REQUESTS
+
+# --- HOT ISSUE CACHE ---
+# Small in-process LRUs of issue rows and of their serialized /issue payloads,
+# shared by /issue/{id} and the legal notice pipeline. Anything that changes an
+# issue row must call invalidate_issue().
+HOT_ISSUE_CACHE_SIZE = 256
+ISSUE_PAYLOAD_CACHE_SIZE = 1024
+
+
+class LRUCache:
+    def __init__(self, maxsize, name=None):
+        self.maxsize = maxsize
+        self.name = name  # Hit/miss counts go to /metrics under this name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                value = None
+            else:
+                self._data.move_to_end(key)
+                value = self._data[key]
+        if self.name:
+            CACHE_REQUESTS.inc(self.name, "miss" if value is None else "hit")
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+HOT_ISSUES = LRUCache(HOT_ISSUE_CACHE_SIZE, name="hot_issue")
+ISSUE_PAYLOADS = LRUCache(ISSUE_PAYLOAD_CACHE_SIZE, name="issue_payload")  # issue_id -> (json bytes, etag)
+
+
+def get_hot_issue(issue_id):
+    """
+    Read-through: cached row, or a primary-key fetch that populates the cache.
+    Falls back to cold storage for archived issues.
+    """
+    issue = HOT_ISSUES.get(issue_id)
+    if issue is None:
+        issue = get_issue_by_id(issue_id) or get_archived_issue(issue_id)
+        if issue:
+            HOT_ISSUES.put(issue_id, issue)
+    return issue
+
+
+def get_issue_payload(issue_id, format_fn):
+    """
+    Read-through cache of the serialized payload. Returns (json bytes, strong ETag)
+    or None when the issue does not exist.
+    """
+    cached = ISSUE_PAYLOADS.get(issue_id)
+    if cached is None:
+        issue = get_hot_issue(issue_id)
+        if not issue:
+            return None
+        body = json.dumps(format_fn(issue), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cached = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        ISSUE_PAYLOADS.put(issue_id, cached)
+    return cached
+
+
+def peek_issue_etag(issue_id):
+    cached = ISSUE_PAYLOADS.get(issue_id)
+    return cached[1] if cached else None
+
+
+def etag_matches(if_none_match, etag):
+    if not etag:
+        return False
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+
+
+def invalidate_issue(issue_id):
+    HOT_ISSUES.pop(issue_id)
+    ISSUE_PAYLOADS.pop(issue_id)
+
+
+def invalidate_all_issues():
+    HOT_ISSUES.clear()
+    ISSUE_PAYLOADS.clear()
@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+log = get_logger("jobs")
+
+# --- IN-PROCESS JOB QUEUE ---
+# Slow work (LLM calls, PDF rendering) runs on a small worker pool so the
+# request returns a job id immediately and the client polls for the result.
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, max_finished=500, name="job"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"civicflow-{name}")
+        self._lock = threading.Lock()
+        self._jobs = {}        # job_id -> job record
+        self._active = {}      # dedupe_key -> job_id (queued/running only)
+        self._max_finished = max_finished
+
+    def submit(self, kind, fn, *args, dedupe_key=None, **kwargs):
+        """
+        Queues fn(*args, **kwargs). If a job with the same dedupe_key is still
+        queued or running, that job is returned instead of starting a new one.
+        """
+        with self._lock:
+            if dedupe_key is not None and dedupe_key in self._active:
+                return dict(self._jobs[self._active[dedupe_key]])
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._jobs[job_id] = job
+            if dedupe_key is not None:
+                self._active[dedupe_key] = job_id
+
+        self._executor.submit(self._run, job_id, dedupe_key, fn, args, kwargs)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id, dedupe_key, fn, args, kwargs):
+        self._update(job_id, status="running")
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status="done", result=result, finished_at=time.time())
+        except Exception as e:
+            log.error("❌ Job %s failed: %s", job_id, e)
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                if dedupe_key is not None and self._active.get(dedupe_key) == job_id:
+                    del self._active[dedupe_key]
+                self._prune()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        # Keep memory bounded: forget the oldest finished jobs
+        finished = [j for j in self._jobs.values() if j["finished_at"] is not None]
+        if len(finished) <= self._max_finished:
+            return
+        finished.sort(key=lambda j: j["finished_at"])
+        for j in finished[:len(finished) - self._max_finished]:
+            del self._jobs[j["id"]]
+
+
+JOB_QUEUE = JobQueue()
+# Own lane for emergency dispatch reasons: one short LLM call each, never stuck
+# behind a backlog of legal-notice LLM + PDF renders on JOB_QUEUE
+DISPATCH_QUEUE = JobQueue(max_workers=2, name="dispatch")
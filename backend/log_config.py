@@ -0,0 +1,128 @@
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+# --- STRUCTURED LOGGING ---
+# Modules log through get_logger("<module>") -> "civicflow.<module>". Handlers
+# only enqueue the record (QueueHandler); a listener thread formats and writes
+# it, so a slow stdout never stalls the event loop. Disabled levels are rejected
+# by the logger before any message formatting happens.
+#   LOG_LEVEL=INFO                                  default level
+#   LOG_LEVELS="database=DEBUG,gemini_utils=WARNING"  per-module overrides
+#   LOG_FORMAT=json | text
+ROOT_LOGGER = "civicflow"
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var = contextvars.ContextVar("civicflow_request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+
+def get_logger(module):
+    return logging.getLogger(f"{ROOT_LOGGER}.{module}")
+
+
+class RequestIdFilter(logging.Filter):
+    # Runs on the calling thread, where the request's context is visible
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or "").split(","):
+        module, _, level = item.partition("=")
+        if module.strip() and level.strip():
+            levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Installs the queue handler/listener once per process. Safe to call repeatedly."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if os.environ.get("LOG_FORMAT", "json") == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()  # Unbounded: enqueueing never blocks
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [handler]
+    root.propagate = False
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    for module, level in _parse_levels(os.environ.get("LOG_LEVELS")).items():
+        logging.getLogger(f"{ROOT_LOGGER}.{module}").setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # Drains what is still queued
+
+
+class RequestIdMiddleware:
+    """ASGI middleware: takes X-Request-ID from the client (or makes one) and echoes it back."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
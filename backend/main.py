@@ -1,22 +1,67 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fpdf import FPDF
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import os
 import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 
 # Import our custom modules
 # Import our custom modules
 try:
-    from backend.database import save_issue_to_db, get_open_issues, get_nearby_volunteers, get_issue_by_id, get_issue_comments, add_comment
-    from backend.ai_agent import classify_issue, rank_issues_for_user, match_volunteers_agent, generate_legal_text
+    from backend.database import STATUS_TRANSITIONS, get_issue_fields, save_issue_to_db, save_issues_batch, save_volunteer, get_volunteer, get_materialized_feed, get_open_issues, get_nearby_volunteers, get_issue_comments, get_department_stats, update_issue_status, get_status_history
+    from backend.ai_agent import classify_issue, rank_issues_for_user, match_volunteers_agent
     from backend.rag_agent import chat_rag_agent
+    from backend.blob_store import save_blob, serve_blob, media_url, to_key
+    from backend.jobs import JOB_QUEUE
+    from backend.notices import get_cached_notice, render_notice, notice_hash, artifact_path, get_notice_issue
+    from backend.issue_cache import get_issue_payload, peek_issue_etag, etag_matches, get_hot_issue, invalidate_issue, invalidate_all_issues
+    from backend.comment_writer import COMMENT_WRITER
+    from backend.archive import archive_resolved_issues, get_archived_comments, get_issues, ARCHIVE_AFTER_DAYS
+    from backend.events import EVENT_HUB, EVENT_ISSUE_CREATED, EVENT_COMMENT_ADDED, EVENT_STATUS_CHANGED, parse_topics, format_sse
+    from backend.startup import startup
+    from backend.metrics import MetricsMiddleware, render_metrics, CACHE_REQUESTS
+    from backend.log_config import get_logger, RequestIdMiddleware
+    from backend.bulk import export_issues, export_comments, EXPORT_FORMATS
+    from backend.batch_reports import analyze_reports, MAX_BATCH_REPORTS
+    from backend.volunteer_index import VOLUNTEER_INDEX
+    from backend.feeds import FEED_MATERIALIZER, FEED_MAX_ITEMS
+    from backend.map_clusters import ISSUE_CLUSTERS
+    from backend.dispatch import create_dispatch, get_dispatch, skills_for_issue, DISPATCH_RADIUS_KM, DISPATCH_CANDIDATES, MAX_DISPATCH_CANDIDATES
 except ImportError:
-    from database import save_issue_to_db, get_open_issues, get_nearby_volunteers, get_issue_by_id, get_issue_comments, add_comment
-    from ai_agent import classify_issue, rank_issues_for_user, match_volunteers_agent, generate_legal_text
+    from database import STATUS_TRANSITIONS, get_issue_fields, save_issue_to_db, save_issues_batch, save_volunteer, get_volunteer, get_materialized_feed, get_open_issues, get_nearby_volunteers, get_issue_comments, get_department_stats, update_issue_status, get_status_history
+    from ai_agent import classify_issue, rank_issues_for_user, match_volunteers_agent
     from rag_agent import chat_rag_agent
-
-app = FastAPI(title="CivicFlow Brain")
+    from blob_store import save_blob, serve_blob, media_url, to_key
+    from jobs import JOB_QUEUE
+    from notices import get_cached_notice, render_notice, notice_hash, artifact_path, get_notice_issue
+    from issue_cache import get_issue_payload, peek_issue_etag, etag_matches, get_hot_issue, invalidate_issue, invalidate_all_issues
+    from comment_writer import COMMENT_WRITER
+    from archive import archive_resolved_issues, get_archived_comments, get_issues, ARCHIVE_AFTER_DAYS
+    from events import EVENT_HUB, EVENT_ISSUE_CREATED, EVENT_COMMENT_ADDED, EVENT_STATUS_CHANGED, parse_topics, format_sse
+    from startup import startup
+    from metrics import MetricsMiddleware, render_metrics, CACHE_REQUESTS
+    from log_config import get_logger, RequestIdMiddleware
+    from bulk import export_issues, export_comments, EXPORT_FORMATS
+    from batch_reports import analyze_reports, MAX_BATCH_REPORTS
+    from volunteer_index import VOLUNTEER_INDEX
+    from feeds import FEED_MATERIALIZER, FEED_MAX_ITEMS
+    from map_clusters import ISSUE_CLUSTERS
+    from dispatch import create_dispatch, get_dispatch, skills_for_issue, DISPATCH_RADIUS_KM, DISPATCH_CANDIDATES, MAX_DISPATCH_CANDIDATES
+
+log = get_logger("main")
+
+# --- LIFESPAN ---
+# Schema setup runs here (once per worker, off the event loop) instead of as an
+# import side effect; the AI/tracing SDKs load lazily. See startup.py.
+@asynccontextmanager
+async def lifespan(app):
+    elapsed = await asyncio.to_thread(startup)
+    log.info("🚀 CivicFlow ready in %.0f ms", elapsed * 1000)
+    yield
+
+app = FastAPI(title="CivicFlow Brain", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,53 +70,25 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware) # Outermost: every log line below carries the id
 
-from fastapi.staticfiles import StaticFiles
-# Mount uploads directory to serve images
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-# --- PDF GENERATOR HELPER ---
-def create_pdf(issue):
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Header
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "CIVICFLOW - CITIZEN DEMAND NOTICE", ln=True, align='C')
-    pdf.ln(10)
-    
-    # Body
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, f"Subject: URGENT NOTICE - {issue['title']}", ln=True)
-    pdf.ln(5)
-    
-    # Get AI Legal Text
-    legal_body = generate_legal_text(
-        issue['title'], 
-        issue['description'],
-        issue.get('category', 'General'),
-        issue.get('ai_analysis')
-    )
-    
-    # Fix for unicode characters in PDF
-    safe_text = legal_body.encode('latin-1', 'replace').decode('latin-1')
-    pdf.multi_cell(0, 7, safe_text)
-    
-    pdf.ln(20)
-    pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 10, "(Generated via CivicFlow App - Bahawalpur)", ln=True, align='C')
+# --- METRICS (Prometheus text format) ---
+@app.get("/metrics")
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    filename = f"notice_{issue['id']}.pdf"
-    pdf.output(filename)
-    return filename, safe_text
+# --- UPLOADS (content-addressed, immutable) ---
+@app.get("/uploads/{key:path}")
+async def get_upload(key: str, request: Request):
+    return serve_blob(request, key)
 
 # --- GLOBAL FEED CACHE ---
 FEED_CACHE = {} # Key: user_id (using 'demo_user' for now), Value: List[dict]
 
 # --- ENDPOINTS ---
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
 
 # ... previous imports ...
@@ -108,36 +125,61 @@ async def analyze_issue(description: str = Form(""), file: UploadFile = File(Non
     analysis['lat'] = 29.3956 # Mock GPS
     analysis['lon'] = 71.6833
     
-    # SAVE IMAGE IF PRESENT
-    image_url = None
-    if file:
+    # SAVE IMAGE IF PRESENT (content-addressed: same bytes -> same key)
+    image_key = None
+    if image_bytes:
         try:
-            filename = f"upload_{os.urandom(4).hex()}_{file.filename}"
-            filepath = os.path.join("uploads", filename)
-            with open(filepath, "wb") as f:
-                f.write(image_bytes)
-            image_url = f"http://localhost:8000/uploads/{filename}"
-            print(f"📸 Image saved to {image_url}")
+            image_key = save_blob(image_bytes, file.filename, mime_type)
+            log.info("📸 Image stored as %s", image_key)
         except Exception as e:
-            print(f"❌ Failed to save image: {e}")
+            log.error("❌ Failed to save image: %s", e)
 
-    analysis['image_url'] = image_url
+    analysis['image_key'] = image_key
+    analysis['image_url'] = media_url(image_key)
     
     # We return the analysis to the frontend. Frontend will verify and then call /publish
     return {"status": "analyzed", "analysis": analysis}
 
-@app.post("/publish_issue")
-async def publish_new_issue(issue: PublishIssueRequest):
+def issue_row(issue: PublishIssueRequest):
     data = issue.dict()
     # Map 'responsible_department' from frontend to 'department' in DB
     data['department'] = data.get('responsible_department', 'General')
+    # Rows hold the relative blob key, never an absolute host URL
+    data['image_url'] = to_key(data.get('image_url'))
+    return data
+
+class BatchReportItem(BaseModel):
+    description: str = ""
+    image_base64: Optional[str] = None
+    mime_type: Optional[str] = None
+    ref: Optional[str] = None # Caller's own id (SMS id, call ticket), echoed back
+
+class BatchReportRequest(BaseModel):
+    reports: List[BatchReportItem]
+
+@app.post("/report/batch")
+async def analyze_issue_batch(batch: BatchReportRequest):
+    """
+    Analysis only, like /report. Streams one NDJSON line per report
+    ({"index", "ref", "status", "analysis" | "error"}) as each finishes.
+    """
+    if len(batch.reports) > MAX_BATCH_REPORTS:
+        return {"error": f"At most {MAX_BATCH_REPORTS} reports per batch"}
+    items = [item.dict() for item in batch.reports]
+    return StreamingResponse(analyze_reports(items), media_type="application/x-ndjson")
+
+@app.post("/publish_issue")
+async def publish_new_issue(issue: PublishIssueRequest):
+    data = issue_row(issue)
     
     # save_issue_to_db handles mapping
     new_id = save_issue_to_db(data)
+    FEED_MATERIALIZER.issue_published(new_id, data) # Background fan-out to nearby volunteers' feeds
+    ISSUE_CLUSTERS.add(new_id, data['lat'], data['lon'], data['severity'])
 
     # --- UPDATE CACHE: INSERT AT TOP ---
     if 'demo_user' in FEED_CACHE:
-        print("⚡ Injecting new issue into Feed Cache...")
+        log.debug("⚡ Injecting new issue into Feed Cache...")
         new_feed_item = {
             "id": new_id,
             "title": data['title'],
@@ -150,28 +192,139 @@ async def publish_new_issue(issue: PublishIssueRequest):
             "match_score": 100, # Max priority
             "reportedBy": "You",
             "department": data.get('department', 'General'),
-            "image_url": data.get('image_url') # Add to cache too
+            "image_url": media_url(data.get('image_url')) # Add to cache too
         }
         FEED_CACHE['demo_user'].insert(0, new_feed_item)
+
+    # --- PUSH TO LIVE SUBSCRIBERS ---
+    EVENT_HUB.publish(EVENT_ISSUE_CREATED, {
+        "id": new_id,
+        "title": data['title'],
+        "category": data['category'],
+        "severity": data['severity'],
+        "lat": data['lat'],
+        "lon": data['lon'],
+        "department": data.get('department', 'General'),
+        "image_url": media_url(data.get('image_url'))
+    })
     
     return {"status": "saved", "id": new_id}
 
+# --- VOLUNTEER PROFILES ---
+class VolunteerProfile(BaseModel):
+    id: Optional[int] = None # Set to update an existing profile
+    name: str
+    phone: Optional[str] = None
+    lat: float
+    lon: float
+    skills: List[str]
+    avatar: Optional[str] = None
+    status: str = "Active"
+
+@app.post("/volunteers")
+async def save_volunteer_profile(profile: VolunteerProfile):
+    data = profile.dict()
+    data['id'] = save_volunteer(data)
+    VOLUNTEER_INDEX.upsert(data)
+    FEED_MATERIALIZER.rebuild(data['id']) # Feed follows the new location/skills
+    return {"status": "saved", "id": data['id']}
+
+@app.get("/volunteers/{user_id}")
+async def get_volunteer_profile(user_id: int):
+    profile = get_volunteer(user_id)
+    if not profile:
+        return {"error": "Volunteer not found"}
+    profile['skills'] = json.loads(profile['skills']) if profile.get('skills') else []
+    return profile
+
+# --- DISPATCH (emergency volunteer matching) ---
+@app.post("/dispatch")
+async def dispatch_volunteers(issue_id: Optional[int] = Form(None), description: str = Form(""),
+                              lat: Optional[float] = Form(None), lon: Optional[float] = Form(None),
+                              skills: str = Form(""), radius_km: float = Form(DISPATCH_RADIUS_KM),
+                              limit: int = Form(DISPATCH_CANDIDATES)):
+    """
+    Ranked volunteers right away; AI reasons follow via GET /dispatch/{id}.
+    Either issue_id (location and skills come from the issue) or lat/lon.
+    skills: comma-separated, added to whatever the issue's tags call for.
+    """
+    tags = None
+    if issue_id is not None:
+        issue = get_issue_fields(issue_id, ("title", "description", "tags", "lat", "lon"))
+        if not issue:
+            return {"error": "Issue not found"}
+        tags = issue['tags']
+        description = description or f"{issue['title']}: {issue['description']}"
+        lat = issue['lat'] if lat is None else lat
+        lon = issue['lon'] if lon is None else lon
+    if lat is None or lon is None:
+        return {"error": "Send issue_id, or lat and lon"}
+
+    return create_dispatch(description, lat, lon, skills_for_issue(tags, skills),
+                           max(0.1, radius_km), max(1, min(limit, MAX_DISPATCH_CANDIDATES)), issue_id)
+
+@app.get("/dispatch/{dispatch_id}")
+async def get_dispatch_status(dispatch_id: str):
+    dispatch = get_dispatch(dispatch_id)
+    if not dispatch:
+        return {"error": "Dispatch not found"}
+    return dispatch
+
+def format_feed_entry(row):
+    """volunteer_feeds row (joined with its issue) -> the /my_feed item shape."""
+    return {
+        "id": row['issue_id'],
+        "title": row['title'],
+        "category": row['category'],
+        "description": row['description'],
+        "severity": row['severity'],
+        "dist_km": round(row['dist_m'] / 1000, 1),
+        "avatar": row.get('avatar') or '',
+        "reason": "Skill Match" if row['skill_match'] else "Nearby Issue",
+        "match_score": row['score'],
+        "reportedBy": row.get('reported_by') or 'Civic Citizen',
+        "department": row.get('department') or 'General',
+        "image_url": media_url(row.get('image_url'))
+    }
+
+async def get_materialized_volunteer_feed(user_id):
+    rows = get_materialized_feed(user_id, FEED_MAX_ITEMS)
+    if not rows:
+        profile = get_volunteer(user_id)
+        if not profile:
+            return {"error": "Volunteer not found"}
+        if profile['feed_built_at'] is None:
+            # First read since the profile was created/seeded: build it once
+            await asyncio.wrap_future(FEED_MATERIALIZER.rebuild(user_id))
+            rows = get_materialized_feed(user_id, FEED_MAX_ITEMS)
+    # Plain JSON types already: skip FastAPI's per-field jsonable_encoder pass
+    return Response(content=json.dumps({"feed": [format_feed_entry(row) for row in rows]}), media_type="application/json")
+
 # --- UPDATE THIS FUNCTION IN backend/main.py ---
 @app.post("/my_feed")
-async def get_volunteer_feed(user_skills: str = Form(...), user_lat: float = Form(...), user_lon: float = Form(...)):
+async def get_volunteer_feed(user_id: Optional[int] = Form(None), user_skills: Optional[str] = Form(None),
+                             user_lat: Optional[float] = Form(None), user_lon: Optional[float] = Form(None)):
+    # Stored volunteer: precomputed feed, one primary-key range read (see feeds.py)
+    if user_id is not None:
+        return await get_materialized_volunteer_feed(user_id)
+    if user_skills is None or user_lat is None or user_lon is None:
+        return {"error": "Send user_id, or user_skills with user_lat and user_lon"}
+
     # 0. CHECK CACHE
     if 'demo_user' in FEED_CACHE:
-        print("🚀 returning CACHED feed (Fast!)")
+        CACHE_REQUESTS.inc("feed", "hit")
+        log.debug("🚀 returning CACHED feed (Fast!)")
         return {"feed": FEED_CACHE['demo_user']}
+    CACHE_REQUESTS.inc("feed", "miss")
 
-    print("🧠 Generating NEW AI Feed (Slow/First Load)...")
+    log.info("🧠 Generating NEW AI Feed (Slow/First Load)...")
 
     # 1. Get All Issues from DB
     all_issues = get_open_issues()
     
     # If DB is empty, return empty
     if not all_issues: 
-        print("⚠️ Database is empty!")
+        log.warning("⚠️ Database is empty!")
         return {"feed": []}
 
     # 2. Try AI Ranking
@@ -180,7 +333,7 @@ async def get_volunteer_feed(user_skills: str = Form(...), user_lat: float = For
         ranking = rank_issues_for_user(user_profile, all_issues)
         recommended_ids = [item['issue_id'] for item in ranking.get("recommended", [])]
     except Exception as e:
-        print(f"❌ AI Ranking Failed: {e}")
+        log.error("❌ AI Ranking Failed: %s", e)
         recommended_ids = []
 
     # 3. CONSTRUCT FEED (Fallback logic)
@@ -201,7 +354,7 @@ async def get_volunteer_feed(user_skills: str = Form(...), user_lat: float = For
             "match_score": 90 if is_recommended else 50,
             "reportedBy": issue.get('reported_by', 'Civic Citizen'),
             "department": issue.get('department', 'General'),
-            "image_url": issue.get('image_url') # Include image in feed
+            "image_url": media_url(issue.get('image_url')) # Include image in feed
         })
 
     # Sort: High scores first
@@ -210,94 +363,383 @@ async def get_volunteer_feed(user_skills: str = Form(...), user_lat: float = For
     # 4. SAVE TO CACHE
     FEED_CACHE['demo_user'] = final_feed
     
-    print(f"✅ Sending {len(final_feed)} items to frontend.")
+    log.info("✅ Sending %d items to frontend.", len(final_feed))
     return {"feed": final_feed}
 
+def format_issue(issue):
+    """Issue row -> payload shape the frontend expects."""
+    return {
+        "id": issue['id'],
+        "title": issue['title'],
+        "category": issue['category'],
+        "description": issue['description'],
+        "severity": issue['severity'],
+        "location": "Bahawalpur", # Mock for now
+        "lat": issue['lat'],
+        "lon": issue['lon'],
+        "tags": json.loads(issue['tags']) if isinstance(issue['tags'], str) else issue['tags'],
+        "status": issue['status'],
+        "aiAnalysis": issue.get('ai_analysis', 'Analysis pending...'), 
+        "supportersJoined": 12, 
+        "volunteersJoined": 5, 
+        "volunteersNeeded": 10, 
+        "reportedBy": issue.get('reported_by', 'Civic Citizen'),
+        "department": issue.get('department', 'General'),
+        "ai_confidence": issue.get('ai_confidence'),
+        "opik_trace_id": issue.get('opik_trace_id'),
+        "fairness_score": issue.get('fairness_score'),
+        "disagreement_rate": issue.get('disagreement_rate'),
+        "financial_relief": issue.get('financial_relief'),
+        "image_url": media_url(issue.get('image_url')),
+        "commentCount": issue.get('comment_count') or 0,
+        "timestamp": "2024-02-01" 
+    }
+
 @app.get("/issue/{issue_id}")
-async def get_issue(issue_id: int):
+async def get_issue(issue_id: int, request: Request):
     try:
-        # 1. Fetch from DB
-        issue = get_issue_by_id(issue_id)
-        
-        if not issue:
+        # 0. Client already has the current version? 304 without DB or serialization work
+        if_none_match = request.headers.get("if-none-match")
+        known_etag = peek_issue_etag(issue_id)
+        if if_none_match and etag_matches(if_none_match, known_etag):
+            return Response(status_code=304, headers={"ETag": known_etag, "Cache-Control": "no-cache"})
+
+        # 1. Cached payload, or fetch + format once
+        cached = get_issue_payload(issue_id, format_issue)
+        if not cached:
             return {"error": "Issue not found"}
 
-        # 2. Format for Frontend
-        return {
-            "id": issue['id'],
-            "title": issue['title'],
-            "category": issue['category'],
-            "description": issue['description'],
-            "severity": issue['severity'],
-            "location": "Bahawalpur", # Mock for now
-            "lat": issue['lat'],
-            "lon": issue['lon'],
-            "tags": json.loads(issue['tags']) if isinstance(issue['tags'], str) else issue['tags'],
-            "status": issue['status'],
-            "aiAnalysis": issue.get('ai_analysis', 'Analysis pending...'), 
-            "supportersJoined": 12, 
-            "volunteersJoined": 5, 
-            "volunteersNeeded": 10, 
-            "volunteersJoined": 5, 
-            "volunteersNeeded": 10, 
-            "reportedBy": issue.get('reported_by', 'Civic Citizen'),
-            "department": issue.get('department', 'General'),
-            "ai_confidence": issue.get('ai_confidence'),
-            "opik_trace_id": issue.get('opik_trace_id'),
-            "fairness_score": issue.get('fairness_score'),
-            "disagreement_rate": issue.get('disagreement_rate'),
-            "financial_relief": issue.get('financial_relief'),
-            "image_url": issue.get('image_url'),
-            "timestamp": "2024-02-01" 
-        }
+        payload, etag = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"} # Always revalidate; 304s are cheap
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        # 2. Body was serialized once when cached
+        return Response(content=payload, media_type="application/json", headers=headers)
     except Exception as e:
         import traceback
         traceback.print_exc()
         return {"error": str(e), "traceback": str(traceback.format_exc())}
 
+# --- ISSUE LIFECYCLE (Open -> In Progress -> Resolved -> Archived) ---
+@app.post("/issue/{issue_id}/status")
+async def change_issue_status(issue_id: int, status: str = Form(...), changed_by: str = Form("Civic Citizen"), note: str = Form("")):
+    try:
+        old_status = update_issue_status(issue_id, status, changed_by, note)
+    except ValueError as e:
+        return {"error": str(e)}
+    if old_status is None:
+        return {"error": "Issue not found"}
+
+    invalidate_issue(issue_id)
+    DEPARTMENT_STATS_CACHE['data'] = None
+    FEED_MATERIALIZER.issue_status_changed(issue_id, status)
+    # Feed only shows open work
+    if 'demo_user' in FEED_CACHE and status != 'Open':
+        FEED_CACHE['demo_user'] = [item for item in FEED_CACHE['demo_user'] if item['id'] != issue_id]
+    elif status == 'Open':
+        FEED_CACHE.pop('demo_user', None) # Reopened: rebuild on next /my_feed
+
+    issue = get_hot_issue(issue_id) or {}
+    if status == 'Open':
+        ISSUE_CLUSTERS.add(issue_id, issue.get('lat'), issue.get('lon'), issue.get('severity'))
+    else:
+        ISSUE_CLUSTERS.remove(issue_id) # Map shows open work only
+    EVENT_HUB.publish(EVENT_STATUS_CHANGED, {
+        "issue_id": issue_id,
+        "from_status": old_status,
+        "to_status": status,
+        "changed_by": changed_by,
+        "lat": issue.get('lat'),
+        "lon": issue.get('lon')
+    })
+    return {"status": "updated", "id": issue_id, "from_status": old_status, "to_status": status}
+
+@app.get("/issue/{issue_id}/history")
+async def issue_status_history(issue_id: int):
+    return {"history": get_status_history(issue_id)}
+
+# --- HISTORY & COLD STORAGE ---
+@app.get("/clusters")
+async def get_issue_clusters(zoom: int = 13, min_lat: Optional[float] = None, min_lon: Optional[float] = None,
+                             max_lat: Optional[float] = None, max_lon: Optional[float] = None):
+    """Map clusters of open issues (count, centroid, max severity) for the viewport at a zoom level"""
+    bbox = None
+    if None not in (min_lat, min_lon, max_lat, max_lon):
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+    return ISSUE_CLUSTERS.query(zoom, bbox)
+
+@app.get("/issues")
+async def list_issues(status: Optional[str] = None, include_archived: bool = False,
+                      before_id: Optional[int] = None, limit: int = 100):
+    issues = get_issues(status, include_archived, before_id, max(1, min(limit, 500)))
+    for issue in issues:
+        issue['image_url'] = media_url(issue.get('image_url'))
+    return {"issues": issues, "next_before_id": issues[-1]['id'] if issues else None}
+
+@app.post("/admin/archive")
+async def run_archive(older_than_days: int = Form(ARCHIVE_AFTER_DAYS)):
+    moved = await asyncio.to_thread(archive_resolved_issues, older_than_days)
+    if moved:
+        invalidate_all_issues() # Cached rows now live in the archive
+    return {"status": "archived", "moved": moved}
+
+# --- BULK SYNC (department partners) ---
+# Exports stream in id order with flat memory (see bulk.py); pass the last id
+# you received as since_id to resume or sync incrementally.
+@app.get("/export/issues")
+async def export_issues_endpoint(format: str = "ndjson", status: Optional[str] = None, since_id: Optional[int] = None):
+    if format not in EXPORT_FORMATS:
+        return {"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}
+    return StreamingResponse(export_issues(format, status, since_id), media_type=EXPORT_FORMATS[format])
+
+@app.get("/export/comments")
+async def export_comments_endpoint(format: str = "ndjson", issue_id: Optional[int] = None, since_id: Optional[int] = None):
+    if format not in EXPORT_FORMATS:
+        return {"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}
+    return StreamingResponse(export_comments(format, issue_id, since_id), media_type=EXPORT_FORMATS[format])
+
+IMPORT_BATCH = 500 # rows per transaction
+
+class ImportIssueRequest(PublishIssueRequest):
+    # /export/issues records carry their lifecycle state and audit fields over;
+    # plain PublishIssueRequest rows still come in as new Open issues
+    status: str = "Open"
+    status_updated_at: Optional[str] = None
+    reported_by: Optional[str] = None
+    avatar: Optional[str] = None
+    ai_confidence: Optional[float] = None
+    opik_trace_id: Optional[str] = None
+    fairness_score: Optional[float] = None
+    disagreement_rate: Optional[float] = None
+    financial_relief: Optional[str] = None
+
+IMPORT_OPTIONAL_FIELDS = ("reported_by", "avatar", "ai_confidence", "opik_trace_id", "fairness_score",
+                          "disagreement_rate", "financial_relief")
+
+def import_row(issue: ImportIssueRequest):
+    data = issue_row(issue)
+    for field in IMPORT_OPTIONAL_FIELDS:
+        if data.get(field) is None:
+            data.pop(field, None) # Insert defaults apply, same as /publish_issue
+    return data
+
+def _validation_message(e):
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+@app.post("/issues/import")
+async def import_issues(request: Request):
+    """
+    Body: NDJSON, one PublishIssueRequest object per line, or /export/issues
+    NDJSON records: those keep their status, status_updated_at and audit fields
+    (ids are reassigned, and comment_count starts at 0 since comments are not
+    imported). Read as it arrives, validated per row and
+    inserted IMPORT_BATCH rows per transaction. Bad rows are reported by line
+    number; the rest are still imported.
+    """
+    ids, errors, batch = [], [], []
+
+    async def flush():
+        results = await asyncio.to_thread(save_issues_batch, [data for _, data in batch])
+        for (line_no, data), result in zip(batch, results):
+            if isinstance(result, int):
+                ids.append(result)
+                if data['status'] == 'Open': # Feeds and the map show open work only
+                    FEED_MATERIALIZER.issue_published(result, data)
+                    ISSUE_CLUSTERS.add(result, data['lat'], data['lon'], data['severity'])
+            else:
+                errors.append({"line": line_no, "error": result})
+        batch.clear()
+
+    async def lines():
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                yield line
+        if pending:
+            yield pending
+
+    line_no = 0
+    async for line in lines():
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+            if not isinstance(raw, dict):
+                errors.append({"line": line_no, "error": "row must be a JSON object"})
+                continue
+            if 'responsible_department' not in raw and raw.get('department'):
+                raw['responsible_department'] = raw['department'] # Export shape
+            row = ImportIssueRequest(**raw)
+            if row.status not in STATUS_TRANSITIONS:
+                errors.append({"line": line_no, "error": f"status: must be one of {', '.join(STATUS_TRANSITIONS)}"})
+                continue
+            batch.append((line_no, import_row(row)))
+        except json.JSONDecodeError as e:
+            errors.append({"line": line_no, "error": f"invalid JSON: {e.msg}"})
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": _validation_message(e)})
+        if len(batch) >= IMPORT_BATCH:
+            await flush()
+    if batch:
+        await flush()
+
+    if ids:
+        FEED_CACHE.pop('demo_user', None) # Rebuild on next /my_feed
+        DEPARTMENT_STATS_CACHE['data'] = None
+    log.info("📥 Imported %d issues (%d rejected)", len(ids), len(errors), extra={"imported": len(ids), "rejected": len(errors)})
+    return {"status": "imported", "imported": len(ids), "failed": len(errors), "ids": ids, "errors": errors}
+
+MAX_COMMENT_PAGE = 200
+
 @app.get("/comments/{issue_id}")
-async def get_comments(issue_id: int):
-    print(f"DEBUG: Fetching comments for issue {issue_id}")
-    comments = get_issue_comments(issue_id)
-    print(f"DEBUG: Found {len(comments)} comments")
-    return {"comments": comments}
+async def get_comments(issue_id: int, before: Optional[str] = None, before_id: Optional[int] = None, limit: int = 50):
+    log.debug("Fetching comments for issue %s", issue_id)
+    limit = max(1, min(limit, MAX_COMMENT_PAGE))
+    issue = get_hot_issue(issue_id)
+    # Fetch one extra row to know whether another page exists
+    if issue and issue.get('archived'):
+        comments = get_archived_comments(issue_id, before, before_id, limit + 1)
+    else:
+        comments = get_issue_comments(issue_id, before, before_id, limit + 1)
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = {"before": comments[-1]['timestamp'], "before_id": comments[-1]['id']}
+    log.debug("Found %d comments", len(comments))
+
+    return {
+        "comments": comments,
+        "next_cursor": next_cursor,
+        "comment_count": issue.get('comment_count', 0) if issue else 0
+    }
 
 @app.post("/comments")
 async def post_comment(issue_id: int = Form(...), user_name: str = Form(...), text: str = Form(...), avatar: str = Form("")):
-    print(f"DEBUG: Posting comment for issue {issue_id}: {text}")
-    new_id = add_comment(issue_id, user_name, text, avatar)
+    log.debug("Posting comment for issue %s: %s", issue_id, text)
+    # Group-committed with other comments arriving in the same few milliseconds
+    new_id = await asyncio.wrap_future(COMMENT_WRITER.submit(issue_id, user_name, text, avatar))
+    invalidate_issue(issue_id) # comment_count changed
+
+    issue = get_hot_issue(issue_id) or {}
+    EVENT_HUB.publish(EVENT_COMMENT_ADDED, {
+        "id": new_id,
+        "issue_id": issue_id,
+        "user_name": user_name,
+        "text": text,
+        "avatar": avatar,
+        "lat": issue.get('lat'),
+        "lon": issue.get('lon')
+    })
     return {"status": "success", "id": new_id}
 
+# --- REAL-TIME EVENTS (replaces polling /my_feed and /comments) ---
+# Filters: topics=issue.created,comment.added  lat/lon/radius_km  issue_id
+
+@app.websocket("/ws/events")
+async def events_ws(websocket: WebSocket, topics: Optional[str] = None, lat: Optional[float] = None,
+                    lon: Optional[float] = None, radius_km: Optional[float] = None, issue_id: Optional[int] = None):
+    await websocket.accept()
+    sub = EVENT_HUB.subscribe(topics=parse_topics(topics), lat=lat, lon=lon, radius_km=radius_km, issue_id=issue_id)
+    try:
+        while True:
+            event = await sub.next_event()
+            await websocket.send_json(event or {"type": "heartbeat"})
+    except (WebSocketDisconnect, ConnectionAbortedError):
+        pass
+    finally:
+        EVENT_HUB.unsubscribe(sub)
+        if sub.dropped:
+            await websocket.close(code=1013) # Try again later
+
+@app.get("/events")
+async def events_sse(request: Request, topics: Optional[str] = None, lat: Optional[float] = None,
+                     lon: Optional[float] = None, radius_km: Optional[float] = None, issue_id: Optional[int] = None):
+    sub = EVENT_HUB.subscribe(topics=parse_topics(topics), lat=lat, lon=lon, radius_km=radius_km, issue_id=issue_id)
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                event = await sub.next_event()
+                yield format_sse(event) if event else ": heartbeat\n\n"
+        except ConnectionAbortedError:
+            pass
+        finally:
+            EVENT_HUB.unsubscribe(sub)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.post("/generate_legal_notice")
 async def generate_notice(issue_id: int = Form(...)):
-    all_issues = get_open_issues()
-    issue = next((x for x in all_issues if x['id'] == issue_id), None)
-    
+    issue = get_notice_issue(issue_id)
     if not issue: return {"error": "Issue not found"}
-    
-    filename, text = create_pdf(issue)
-    return {"filename": filename, "preview_text": text}
+
+    # Already rendered for this exact issue text? Skip the LLM and FPDF entirely.
+    cached = get_cached_notice(issue)
+    if cached:
+        return {"status": "done", "job_id": None, **cached}
+
+    # Otherwise render in the background; the client polls /notice_jobs/{job_id}
+    job = JOB_QUEUE.submit("legal_notice", render_notice, issue,
+                           dedupe_key=("legal_notice", issue_id, notice_hash(issue)))
+    return {"status": job['status'], "job_id": job['id']}
+
+@app.get("/notice_jobs/{job_id}")
+async def get_notice_job(job_id: str):
+    job = JOB_QUEUE.get(job_id)
+    if not job:
+        return {"error": "Job not found"}
+
+    response = {"job_id": job['id'], "status": job['status']}
+    if job['status'] == "done":
+        response.update(job['result'])
+    elif job['status'] == "failed":
+        response['error'] = job['error']
+    return response
 
 @app.get("/download_pdf/{filename}")
 async def download_pdf(filename: str):
-    if os.path.exists(filename):
-        return FileResponse(filename, media_type="application/pdf", filename=filename)
+    # Only serve rendered artifacts; FileResponse streams the file in chunks
+    path = artifact_path(filename)
+    if path and os.path.exists(path):
+        return FileResponse(path, media_type="application/pdf", filename=filename)
     return {"error": "File missing"}
 
+DEPARTMENT_STATS_TTL = 30 # seconds
+DEPARTMENT_STATS_CACHE = {"at": 0, "data": None}
+
 @app.get("/departments/stats")
-async def get_department_stats():
-    # Mock data for now. In real app, would query DB for resolved/total issues per dept
-    return {
-        "trending": [
-            {"name": "Traffic Police", "score": 95, "resolved": 120, "trend": "up"},
-            {"name": "Rescue 1122", "score": 92, "resolved": 85, "trend": "up"},
-            {"name": "Waste Management", "score": 78, "resolved": 450, "trend": "stable"}
-        ],
-        "needs_attention": [
-            {"name": "WAPDA (Power)", "score": 45, "resolved": 12, "trend": "down"},
-            {"name": "Roads Dept", "score": 30, "resolved": 5, "trend": "down"}
-        ]
+async def get_department_stats_endpoint():
+    # Short cache on top of the materialized department_stats table
+    if DEPARTMENT_STATS_CACHE['data'] and time.time() - DEPARTMENT_STATS_CACHE['at'] < DEPARTMENT_STATS_TTL:
+        return DEPARTMENT_STATS_CACHE['data']
+
+    ranked = []
+    for row in get_department_stats():
+        if row['resolved_recent'] > row['resolved_prev']:
+            trend = "up"
+        elif row['resolved_recent'] < row['resolved_prev']:
+            trend = "down"
+        else:
+            trend = "stable"
+        ranked.append({
+            "name": row['department'],
+            "score": round(100 * row['resolved'] / row['total']),
+            "resolved": row['resolved'],
+            "total": row['total'],
+            "trend": trend
+        })
+    ranked.sort(key=lambda d: (d['score'], d['resolved']), reverse=True)
+
+    data = {
+        "trending": [d for d in ranked if d['score'] >= 50][:5],
+        "needs_attention": [d for d in reversed(ranked) if d['score'] < 50][:5]
     }
+    DEPARTMENT_STATS_CACHE.update(at=time.time(), data=data)
+    return data
 
 # --- CHATBOT ENDPOINT ---
 
@@ -0,0 +1,147 @@
+import math
+import threading
+
+try:
+    from backend.database import get_open_issue_points
+    from backend.log_config import get_logger
+except ImportError:
+    from database import get_open_issue_points
+    from log_config import get_logger
+
+log = get_logger("map_clusters")
+
+# --- MAP CLUSTER PYRAMID ---
+# Pre-aggregated clusters of open issues for every zoom level, so the live map
+# draws O(visible clusters) markers instead of one per issue. At zoom z a map
+# tile spans 360 / 2**z degrees, split into CELLS_PER_TILE x CELLS_PER_TILE
+# cluster cells (same grid as civic_flow_V1/clusters.py). Loaded from the DB on
+# first use, then kept current by publish, import and status changes: an issue
+# is on the map while it is Open. Per-process, like the volunteer index.
+MIN_ZOOM = 3
+MAX_ZOOM = 18
+CELLS_PER_TILE = 8
+MAX_SEVERITY = 10
+
+
+def cell_size(zoom):
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def _severity(value):
+    return min(max(int(value or 0), 0), MAX_SEVERITY)
+
+
+class IssueClusters:
+    def __init__(self, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._issues = {}  # issue_id -> (lat, lon, severity), issues on the map
+        # zoom -> {(x, y): [count, sum_lat, sum_lon, sum_id, issues per severity level]}
+        # Sums rather than extremes, so removing an issue is as cheap as adding one
+        self._levels = {z: {} for z in range(min_zoom, max_zoom + 1)}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for issue_id, lat, lon, severity in get_open_issue_points():
+                self._add(issue_id, lat, lon, severity)
+            self._loaded = True
+            log.info("Clustered %d open issues", len(self._issues))
+
+    def clamp(self, zoom):
+        return max(self.min_zoom, min(self.max_zoom, int(zoom)))
+
+    def _cells(self, lat, lon):
+        for zoom, cells in self._levels.items():
+            size = cell_size(zoom)
+            yield cells, (math.floor((lon + 180) / size), math.floor((lat + 90) / size))
+
+    def _add(self, issue_id, lat, lon, severity):
+        if issue_id in self._issues or lat is None or lon is None:
+            return
+        severity = _severity(severity)
+        self._issues[issue_id] = (lat, lon, severity)
+        for cells, key in self._cells(lat, lon):
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [0, 0.0, 0.0, 0, [0] * (MAX_SEVERITY + 1)]
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lon
+            cell[3] += issue_id
+            cell[4][severity] += 1
+
+    def _remove(self, issue_id):
+        point = self._issues.pop(issue_id, None)
+        if point is None:
+            return
+        lat, lon, severity = point
+        for cells, key in self._cells(lat, lon):
+            cell = cells[key]
+            if cell[0] == 1:
+                del cells[key]
+                continue
+            cell[0] -= 1
+            cell[1] -= lat
+            cell[2] -= lon
+            cell[3] -= issue_id
+            cell[4][severity] -= 1
+
+    def add(self, issue_id, lat, lon, severity):
+        """Puts an open issue on the map (no-op if it is already there)."""
+        self._ensure_loaded()
+        with self._lock:
+            self._add(issue_id, lat, lon, severity)
+
+    def remove(self, issue_id):
+        self._ensure_loaded()
+        with self._lock:
+            self._remove(issue_id)
+
+    def reload(self):
+        with self._lock:
+            self._issues = {}
+            self._levels = {z: {} for z in self._levels}
+            self._loaded = False
+        self._ensure_loaded()
+
+    def query(self, zoom, bbox=None):
+        """Clusters at a zoom level, optionally only those inside bbox = (min_lat, min_lon, max_lat, max_lon)."""
+        self._ensure_loaded()
+        zoom = self.clamp(zoom)
+        size = cell_size(zoom)
+        with self._lock:
+            cells = self._levels[zoom]
+            if bbox:
+                x0, y0 = math.floor((bbox[1] + 180) / size), math.floor((bbox[0] + 90) / size)
+                x1, y1 = math.floor((bbox[3] + 180) / size), math.floor((bbox[2] + 90) / size)
+                if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+                    keys = [k for k in cells if x0 <= k[0] <= x1 and y0 <= k[1] <= y1]
+                else:
+                    keys = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in cells]
+            else:
+                keys = list(cells)
+
+            clusters = []
+            for key in keys:
+                count, sum_lat, sum_lon, sum_id, severities = cells[key]
+                clusters.append({
+                    "lat": sum_lat / count,  # Centroid of the issues, not the cell centre
+                    "lon": sum_lon / count,
+                    "count": count,
+                    "max_severity": max(s for s, n in enumerate(severities) if n),
+                    "id": sum_id if count == 1 else None,  # Single issue: open it directly
+                })
+        return clusters
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._issues)
+
+
+ISSUE_CLUSTERS = IssueClusters()
@@ -0,0 +1,160 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# --- METRICS ---
+# In-process counters and histograms, rendered in the Prometheus text format on
+# /metrics. Recording is a bisect plus a few additions under a per-metric lock;
+# nothing is exported until someone scrapes. Per-process: with several uvicorn
+# workers, each worker is its own scrape target.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (100, 300, 1000, 3000, 10000, 30000, 100000, 300000)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count], sum, count
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = (("le", _format_number(float(bound))),)
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {count}"
+
+
+def timed(histogram, label=None):
+    """
+    Decorator: observes the wall time of each call in histogram, labelled with
+    label (default: the function's name). Exceptions are timed too.
+    """
+    def decorator(fn):
+        name = label or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template (bounded label set)."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; raw paths would explode cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status[0]))
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- APP METRICS ---
+HTTP_REQUEST_SECONDS = Histogram("civicflow_http_request_seconds", "HTTP request latency by route", ("method", "route", "status"))
+
+AI_MODEL_SECONDS = Histogram("civicflow_ai_model_seconds", "Latency of one generate_content attempt", ("model", "outcome"))
+AI_FALLBACK_DEPTH = Histogram("civicflow_ai_fallback_depth", "Models tried before one answered (len(models) = all failed)", (), (0, 1, 2, 3, 4))
+AI_PROMPT_CHARS = Histogram("civicflow_ai_prompt_chars", "Prompt size in characters", (), SIZE_BUCKETS)
+AI_RESPONSE_CHARS = Histogram("civicflow_ai_response_chars", "Response size in characters", ("model",), SIZE_BUCKETS)
+AI_TOKENS = Counter("civicflow_ai_tokens_total", "Tokens reported by the model", ("model", "kind"))
+AI_BATCH_ITEMS = Counter("civicflow_ai_batch_items_total", "/report/batch items by how they were answered", ("mode",))
+
+DB_QUERY_SECONDS = Histogram("civicflow_db_query_seconds", "Time spent in each database function", ("function",))
+
+CACHE_REQUESTS = Counter("civicflow_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    from backend.ai_agent import generate_legal_text
+    from backend.issue_cache import get_hot_issue
+except ImportError:
+    from ai_agent import generate_legal_text
+    from issue_cache import get_hot_issue
+
+# --- LEGAL NOTICE ARTIFACTS ---
+# Rendered notices are cached per (issue id, content hash): the same issue text
+# never hits the LLM or FPDF twice, and an edited issue gets a fresh notice.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.environ.get("NOTICE_ARTIFACTS_DIR", os.path.join(BASE_DIR, "artifacts", "notices"))
+
+NOTICE_FIELDS = ("title", "description", "category", "ai_analysis")
+
+_FILENAME_RE = re.compile(r"^notice_\d+_[0-9a-f]{16}\.pdf$")
+
+
+def get_notice_issue(issue_id):
+    """
+    The fields create_pdf needs, for any status. Read through the shared
+    hot-issue cache, so repeated notices for the same issue skip SQLite.
+    """
+    issue = get_hot_issue(issue_id)
+    if issue:
+        return {f: issue.get(f) for f in ("id",) + NOTICE_FIELDS}
+    return None
+
+
+def notice_hash(issue):
+    payload = json.dumps([issue.get(f) for f in NOTICE_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _artifact_base(issue):
+    return f"notice_{issue['id']}_{notice_hash(issue)[:16]}"
+
+
+def artifact_path(filename):
+    """Absolute path of a rendered PDF, or None for names we did not produce."""
+    if not _FILENAME_RE.match(filename or ""):
+        return None
+    return os.path.join(ARTIFACTS_DIR, filename)
+
+
+def get_cached_notice(issue):
+    base = _artifact_base(issue)
+    pdf_path = os.path.join(ARTIFACTS_DIR, base + ".pdf")
+    txt_path = os.path.join(ARTIFACTS_DIR, base + ".txt")
+    if not (os.path.exists(pdf_path) and os.path.exists(txt_path)):
+        return None
+    with open(txt_path, "r", encoding="latin-1") as f:
+        return {"filename": base + ".pdf", "preview_text": f.read()}
+
+
+def _atomic_write(path, write_fn):
+    tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# --- PDF GENERATOR HELPER ---
+def create_pdf(issue):
+    from fpdf import FPDF # Only the background notice job needs it
+    pdf = FPDF()
+    pdf.add_page()
+
+    # Header
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "CIVICFLOW - CITIZEN DEMAND NOTICE", ln=True, align='C')
+    pdf.ln(10)
+
+    # Body
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Subject: URGENT NOTICE - {issue['title']}", ln=True)
+    pdf.ln(5)
+
+    # Get AI Legal Text
+    legal_body = generate_legal_text(
+        issue['title'],
+        issue['description'],
+        issue.get('category', 'General'),
+        issue.get('ai_analysis')
+    )
+
+    # Fix for unicode characters in PDF
+    safe_text = legal_body.encode('latin-1', 'replace').decode('latin-1')
+    pdf.multi_cell(0, 7, safe_text)
+
+    pdf.ln(20)
+    pdf.set_font("Arial", 'I', 10)
+    pdf.cell(0, 10, "(Generated via CivicFlow App - Bahawalpur)", ln=True, align='C')
+
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    base = _artifact_base(issue)
+    # PDF first, text last: the .txt is what marks the artifact as complete
+    _atomic_write(os.path.join(ARTIFACTS_DIR, base + ".pdf"), pdf.output)
+
+    def write_text(path):
+        with open(path, "w", encoding="latin-1") as f:
+            f.write(safe_text)
+    _atomic_write(os.path.join(ARTIFACTS_DIR, base + ".txt"), write_text)
+
+    return base + ".pdf", safe_text
+
+
+def render_notice(issue):
+    """Job body: returns the cached artifact or renders a new one."""
+    cached = get_cached_notice(issue)
+    if cached:
+        return cached
+    filename, text = create_pdf(issue)
+    return {"filename": filename, "preview_text": text}
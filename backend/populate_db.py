@@ -1,6 +1,8 @@
+import argparse
 import sqlite3
 import json
 import random
+import seed_data
 from database import DB_NAME, init_db 
 
 # Clean old data first
@@ -9,6 +11,17 @@ def clean_db():
     c = conn.cursor()
     # Drop table to force schema update in dev
     c.execute("DROP TABLE IF EXISTS issues")
+    # Materialized stats would otherwise keep counting the dropped rows
+    c.execute("DROP TABLE IF EXISTS department_stats")
+    c.execute("DROP TABLE IF EXISTS department_stats_daily")
+    c.execute("DROP TABLE IF EXISTS department_stats_archived")
+    # Feeds point at issue ids that are about to be reused; rebuild them on next read
+    c.execute("DROP TABLE IF EXISTS volunteer_feeds")
+    c.execute("PRAGMA table_info(users)")
+    if 'feed_built_at' in [info[1] for info in c.fetchall()]:
+        c.execute("UPDATE users SET feed_built_at = NULL")
+    # Tables are gone: make init_db run its full schema setup again
+    c.execute("PRAGMA user_version = 0")
     conn.commit()
     conn.close()
     
@@ -19,6 +32,8 @@ def clean_db():
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     c.execute("DELETE FROM issues")
+    # The delete trigger takes them back out of the totals; today's opened bucket still has them
+    c.execute("DELETE FROM department_stats_daily")
     conn.commit()
     conn.close()
 
@@ -264,23 +279,32 @@ MOCK_DATA = [
   }
 ]
 
-def populate_exact_data():
+def populate_exact_data(synthetic=0, seed=42):
     clean_db()
     
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     print("Injecting Exact Mock Data...")
     
-    for item in MOCK_DATA:
-        c.execute('''INSERT INTO issues (id, title, category, description, lat, lon, tags, severity, ai_analysis, reported_by, ai_confidence, opik_trace_id, fairness_score, disagreement_rate, financial_relief)
+    # One executemany in one transaction instead of a statement per row
+    c.executemany('''INSERT INTO issues (id, title, category, description, lat, lon, tags, severity, ai_analysis, reported_by, ai_confidence, opik_trace_id, fairness_score, disagreement_rate, financial_relief)
                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
-                  (item['id'], item['title'], item['category'], item['description'], item['lat'], item['lon'], json.dumps(item['tags']), item['severity'], item.get('aiAnalysis', 'Analysis pending...'), item.get('reportedBy', 'Civic Citizen'), item.get('aiConfidence'), item.get('opikTraceId'), item.get('fairnessScore'), item.get('disagreementRate'), item.get('financialRelief')))
-    
-    conn.commit()
+                  [(item['id'], item['title'], item['category'], item['description'], item['lat'], item['lon'], json.dumps(item['tags']), item['severity'], item.get('aiAnalysis', 'Analysis pending...'), item.get('reportedBy', 'Civic Citizen'), item.get('aiConfidence'), item.get('opikTraceId'), item.get('fairnessScore'), item.get('disagreementRate'), item.get('financialRelief'))
+                   for item in MOCK_DATA])
     
     conn.commit()
     conn.close()
     print("Done! Mock data injected.")
 
+    if synthetic:
+        # City-scale synthetic data on top of the curated demo rows
+        print(f"Generating {synthetic} synthetic issues (seed {seed})...")
+        counts = seed_data.seed(issues=synthetic, seed=seed)
+        print(f"Done! {counts['issues']} issues, {counts['volunteers']} volunteers, {counts['comments']} comments added.")
+
 if __name__ == "__main__":
-    populate_exact_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reset the demo DB with the curated mock issues.")
+    parser.add_argument("--synthetic", type=int, default=0, help="also generate this many synthetic issues (see seed_data.py)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    populate_exact_data(args.synthetic, args.seed)
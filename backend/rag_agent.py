@@ -1,15 +1,13 @@
-import google.generativeai as genai
 import os
 import json
-import opik
 try:
     from backend.database import get_open_issues
+    from backend.tracing import track
 except ImportError:
     from database import get_open_issues
+    from tracing import track
 
-# Configure Opik (Safety Tracking)
-if os.environ.get("OPIK_API_KEY"):
-    opik.configure(use_local=False)
+# Opik (Safety Tracking) is configured lazily by tracing.py on the first traced call
 
 # Mock Knowledge Base (Laws/Rules)
 KNOWLEDGE_BASE = {
@@ -19,7 +17,7 @@ KNOWLEDGE_BASE = {
     "Citizen Rights": "Every citizen has the right to clean drinking water and a safe environment under Article 9 of the Constitution."
 }
 
-@opik.track(name="RAG Retriever")
+@track(name="RAG Retriever")
 def retrieve_documents(query):
     """
     Simple retrieval: specific laws + relevant issues from DB.
@@ -49,7 +47,7 @@ def retrieve_documents(query):
     
     return "\n".join(context)
 
-@opik.track(name="RAG Chatbot")
+@track(name="RAG Chatbot")
 def chat_rag_agent(query, use_docs=True):
     """
     RAG Chatbot: Answers query using context if requested.
@@ -0,0 +1,263 @@
+import argparse
+import datetime
+import json
+import math
+import random
+import sqlite3
+import time
+from collections import Counter
+
+try:
+    from backend import database
+    from backend.log_config import get_logger, configure_logging
+except ImportError:
+    import database
+    from log_config import get_logger, configure_logging
+
+log = get_logger("seed_data")
+
+# --- SYNTHETIC CITY DATA ---
+# Deterministic (same seed + as_of -> same rows) city-scale data around
+# Bahawalpur for demos, benchmarks and load tests:
+# - issues cluster around neighbourhood hotspots (busy areas report more), with a
+#   thin uniform background across the city;
+# - volunteers live near the same hotspots, with a realistic skill mix;
+# - comment threads are heavy-tailed: most issues get a few comments, a few go viral.
+# Rows are generated lazily and written with executemany in one transaction per
+# run, with journaling relaxed for the load and the stats triggers rebuilt after.
+CENTER = (29.3956, 71.6833)
+CITY_RADIUS_DEG = 0.06
+BACKGROUND_SHARE = 0.1
+HISTORY_DAYS = 90
+BATCH_SIZE = 20000
+
+# (name, lat, lon, spread in degrees, relative activity)
+HOTSPOTS = [
+    ("Farid Gate", 29.3980, 71.6880, 0.004, 10),
+    ("Shahi Bazaar", 29.3935, 71.6845, 0.003, 9),
+    ("Model Town A", 29.3850, 71.6650, 0.006, 6),
+    ("Satellite Town", 29.4100, 71.6550, 0.007, 6),
+    ("Circular Road", 29.3960, 71.6790, 0.004, 8),
+    ("University Chowk", 29.3760, 71.7150, 0.005, 5),
+    ("Railway Road", 29.4020, 71.6950, 0.004, 5),
+    ("Cantt Area", 29.4250, 71.6700, 0.008, 3),
+    ("Baghdad-ul-Jadeed", 29.3750, 71.7600, 0.008, 3),
+    ("One Unit Chowk", 29.3890, 71.6980, 0.003, 7),
+    ("Dera Nawab Road", 29.3550, 71.6900, 0.009, 2),
+    ("Islamia Colony", 29.4050, 71.6750, 0.005, 4),
+]
+
+# (category, title, tag, department, relative frequency, typical severity)
+ISSUE_TEMPLATES = [
+    ("GOVT", "Pothole near {place}", "Road Safety", "Traffic Police / Highways", 14, 7),
+    ("GOVT", "Sewage overflow at {place}", "Sanitation", "WASA", 12, 8),
+    ("GOVT", "Broken streetlight in {place}", "Infrastructure", "Municipal Corporation", 9, 5),
+    ("GOVT", "Garbage pile-up at {place}", "Sanitation", "Solid Waste Management", 13, 6),
+    ("GOVT", "Exposed electric wires in {place}", "Electrical Safety", "LESCO", 4, 9),
+    ("GOVT", "Water supply cut in {place}", "Water", "WASA", 6, 7),
+    ("GOVT", "Encroachment blocking road at {place}", "Traffic", "Municipal Corporation", 5, 4),
+    ("VOLUNTEER", "Blood donors needed near {place}", "Medical", "Health Department", 4, 9),
+    ("VOLUNTEER", "Food drive in {place}", "Community", "Social Welfare", 5, 5),
+    ("VOLUNTEER", "Stray animals need care at {place}", "Animals", "General", 4, 4),
+    ("VOLUNTEER", "Tutors wanted for kids in {place}", "Education", "Social Welfare", 3, 3),
+    ("VOLUNTEER", "Flood relief packing at {place}", "Rescue", "PDMA", 2, 8),
+]
+
+# Skills with relative prevalence among volunteers; most list one or two
+SKILL_WEIGHTS = {"Medical": 12, "Rescue": 8, "Transport": 15, "Teaching": 14, "Cooking": 16,
+                 "Construction": 10, "Legal": 4, "Animals": 7, "IT": 9, "Counseling": 5}
+SKILL_COUNT_WEIGHTS = {1: 50, 2: 35, 3: 15}
+VOLUNTEER_ACTIVE_SHARE = 0.85
+
+STATUS_WEIGHTS = {"Open": 35, "In Progress": 15, "Resolved": 50}
+
+FIRST_NAMES = ["Ayesha", "Ali", "Fatima", "Hamza", "Zainab", "Usman", "Maryam", "Bilal", "Sana", "Omar",
+               "Hira", "Ahmed", "Iqra", "Hassan", "Noor", "Saad", "Amna", "Faisal", "Mehwish", "Tariq"]
+LAST_NAMES = ["Khan", "Malik", "Qureshi", "Sheikh", "Butt", "Chaudhry", "Abbasi", "Siddiqui", "Raza", "Javed"]
+COMMENT_OPENERS = ["Same problem on our street.", "Reported this last week too.", "Can help this weekend.",
+                   "Any update from the department?", "This is getting worse.", "Thank you for raising this!",
+                   "I live nearby and can confirm.", "Kids walk past this every day.", "Shared with the union council.",
+                   "Still not fixed as of today."]
+MEAN_COMMENTS_PER_ISSUE = 3
+COMMENT_TAIL_ALPHA = 1.3   # Pareto shape: lower = more viral threads
+MAX_THREAD_LENGTH = 2000
+
+
+def _weighted(rng, weights, k):
+    return rng.choices(list(weights), list(weights.values()), k=k)
+
+
+def _point(rng, hotspot):
+    if hotspot is None or rng.random() < BACKGROUND_SHARE:
+        # Background noise anywhere in the city disc
+        r, theta = CITY_RADIUS_DEG * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+        return CENTER[0] + r * math.sin(theta), CENTER[1] + r * math.cos(theta)
+    _, lat, lon, spread, _ = hotspot
+    return lat + rng.gauss(0, spread), lon + rng.gauss(0, spread)
+
+
+NAMES = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+
+
+def _pick(rng, items):
+    # rng.random() is a single C call; noticeably cheaper than rng.choice per row
+    return items[int(rng.random() * len(items))]
+
+
+def generate_issues(count, rng, as_of):
+    """Yields (row, opened_at) per issue. Rows match INSERT_ISSUE."""
+    hotspots = rng.choices(HOTSPOTS, [h[4] for h in HOTSPOTS], k=count)
+    templates = rng.choices(ISSUE_TEMPLATES, [t[4] for t in ISSUE_TEMPLATES], k=count)
+    statuses = _weighted(rng, STATUS_WEIGHTS, count)
+    text = {}  # (template, hotspot) -> (title, description, tags json): 144 combinations, reused
+    for hotspot, template, status in zip(hotspots, templates, statuses):
+        category, _, tag, department, _, severity = template
+        key = (template[1], hotspot[0])
+        if key not in text:
+            title = template[1].format(place=hotspot[0])
+            text[key] = (title, f"{title}. Reported by residents of {hotspot[0]}.", json.dumps([tag]))
+        title, description, tags = text[key]
+        lat, lon = _point(rng, hotspot)
+        opened_at = as_of - rng.random() * HISTORY_DAYS * 86400
+        status_updated_at = None if status == "Open" else int(opened_at + rng.random() * (as_of - opened_at))
+        row = (title, category, description, lat, lon, tags,
+               max(1, min(10, round(rng.gauss(severity, 1.5)))), status, department, _pick(rng, NAMES), status_updated_at)
+        yield row, opened_at
+
+
+def generate_volunteers(count, rng):
+    hotspots = rng.choices(HOTSPOTS, [h[4] for h in HOTSPOTS], k=count)
+    for i, hotspot in enumerate(hotspots):
+        wanted = _weighted(rng, SKILL_COUNT_WEIGHTS, 1)[0]
+        skills = []
+        while len(skills) < wanted:
+            skill = _weighted(rng, SKILL_WEIGHTS, 1)[0]
+            if skill not in skills:
+                skills.append(skill)
+        lat, lon = _point(rng, hotspot)
+        status = "Active" if rng.random() < VOLUNTEER_ACTIVE_SHARE else "Inactive"
+        yield (_pick(rng, NAMES), f"03{rng.randint(0, 99):02d}-{rng.randint(0, 9999999):07d}", lat, lon,
+               json.dumps(skills), f"https://i.pravatar.cc/150?u=seed{i}", status)
+
+
+def thread_lengths(issue_count, total_comments, rng):
+    """Comment counts per issue (by index): heavy-tailed, summing to total_comments."""
+    if not issue_count or not total_comments:
+        return Counter()
+    weights = [min(rng.paretovariate(COMMENT_TAIL_ALPHA), MAX_THREAD_LENGTH) for _ in range(issue_count)]
+    return Counter(rng.choices(range(issue_count), weights, k=total_comments))
+
+
+def generate_comments(lengths, first_issue_id, opened_at, rng, as_of):
+    """Each thread starts after its issue opened and moves forward in time."""
+    for index in sorted(lengths):
+        t = opened_at[index]
+        for _ in range(lengths[index]):
+            t = min(as_of, t + rng.expovariate(1 / 7200))  # ~2h between replies
+            yield (first_issue_id + index, _pick(rng, NAMES), "", _pick(rng, COMMENT_OPENERS), int(t))
+
+
+def _chunks(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+INSERT_ISSUE = '''INSERT INTO issues (title, category, description, lat, lon, tags, severity, status, department,
+                                    reported_by, status_updated_at, ai_analysis, comment_count)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime(?, 'unixepoch'), 'Analysis pending...', 0)'''
+# Timestamps are passed as epoch seconds and formatted by SQLite (same text format as CURRENT_TIMESTAMP)
+INSERT_COMMENT = '''INSERT INTO comments (issue_id, user_name, avatar, text, timestamp)
+                    VALUES (?, ?, ?, ?, datetime(?, 'unixepoch'))'''
+
+
+def seed(issues=1000, volunteers=None, comments=None, seed=42, as_of=None):
+    """
+    Appends synthetic rows to DB_NAME and returns the counts. as_of (epoch
+    seconds) anchors every timestamp; it defaults to today's midnight UTC, so a
+    given seed produces identical rows all day (pass it for exact reruns).
+    """
+    volunteers = issues // 10 if volunteers is None else volunteers
+    comments = issues * MEAN_COMMENTS_PER_ISSUE if comments is None else comments
+    if as_of is None:
+        as_of = (time.time() // 86400) * 86400
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    database.init_db()
+    conn = sqlite3.connect(database.DB_NAME, isolation_level=None)
+    c = conn.cursor()
+    # Bulk-load settings for this connection only; the file keeps its normal durability
+    c.execute("PRAGMA synchronous = OFF")
+    c.execute("PRAGMA cache_size = -262144")  # 256 MB
+    c.execute("PRAGMA temp_store = MEMORY")
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        # Per-row stats triggers and index updates would dominate the load: drop them,
+        # then rebuild the stats from the data and each index in one sorted pass
+        c.execute("DROP TRIGGER IF EXISTS trg_department_stats_insert")
+        c.execute("DROP TRIGGER IF EXISTS trg_department_stats_status")
+        c.execute("""SELECT name, sql FROM sqlite_master
+                     WHERE type = 'index' AND tbl_name IN ('issues', 'users', 'comments') AND sql IS NOT NULL""")
+        indexes = c.fetchall()
+        for name, _ in indexes:
+            c.execute(f"DROP INDEX {name}")
+
+        c.execute("SELECT COALESCE(MAX(id), 0) FROM issues")
+        first_issue_id = c.fetchone()[0] + 1
+        opened_at, opened_days = [], Counter()
+        for batch in _chunks(generate_issues(issues, rng, as_of)):
+            c.executemany(INSERT_ISSUE, [row for row, _ in batch])
+            opened_at.extend(t for _, t in batch)
+            opened_days.update((row[8], time.strftime("%Y-%m-%d", time.gmtime(t))) for row, t in batch)
+
+        for batch in _chunks(generate_volunteers(volunteers, rng)):
+            c.executemany('INSERT INTO users (name, phone, lat, lon, skills, avatar, status) VALUES (?,?,?,?,?,?,?)', batch)
+
+        lengths = thread_lengths(issues, comments, rng)
+        for batch in _chunks(generate_comments(lengths, first_issue_id, opened_at, rng, as_of)):
+            c.executemany(INSERT_COMMENT, batch)
+        c.executemany("UPDATE issues SET comment_count = comment_count + ? WHERE id = ?",
+                      ((n, first_issue_id + index) for index, n in lengths.items()))
+
+        for _, sql in indexes:
+            c.execute(sql)
+        # Issues have no creation timestamp, so the opened buckets come from the generator
+        c.executemany("""INSERT INTO department_stats_daily (department, day, opened) VALUES (?, ?, ?)
+                         ON CONFLICT(department, day) DO UPDATE SET opened = opened + excluded.opened""",
+                      ((department, day, n) for (department, day), n in opened_days.items()))
+        # Recreates the triggers, rebuilds totals and resolved buckets (commits)
+        database.init_department_stats(c, rebuild=True)
+        if conn.in_transaction:
+            c.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            c.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    log.info("🌱 Seeded %d issues, %d volunteers, %d comments in %.1fs",
+             issues, volunteers, comments, time.perf_counter() - started)
+    return {"issues": issues, "volunteers": volunteers, "comments": comments, "first_issue_id": first_issue_id}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the CivicFlow DB (DB_NAME) with synthetic city data.")
+    parser.add_argument("--issues", type=int, default=10000)
+    parser.add_argument("--volunteers", type=int, default=None, help="default: issues / 10")
+    parser.add_argument("--comments", type=int, default=None, help=f"default: issues * {MEAN_COMMENTS_PER_ISSUE}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--as-of", help="anchor date for timestamps, YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    configure_logging()
+    as_of = None
+    if args.as_of:
+        as_of = datetime.datetime.strptime(args.as_of, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc).timestamp()
+    seed(args.issues, args.volunteers, args.comments, args.seed, as_of)
@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+
+try:
+    from backend.database import init_db
+    from backend.log_config import get_logger, configure_logging
+except ImportError:
+    from database import init_db
+    from log_config import get_logger, configure_logging
+
+log = get_logger("startup")
+
+# --- APPLICATION STARTUP ---
+# Nothing heavy happens at import time. The API's lifespan calls startup() once;
+# the Gemini/Opik SDKs are imported on first use (or pre-warmed in the
+# background), so a worker can accept requests well under a second after boot.
+PREWARM_SDKS = os.environ.get("PREWARM_SDKS", "1") != "0"
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env():
+    """Loads .env once per process. Safe to call from any lazy init path."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def _prewarm():
+    # Pays the SDK import cost off the request path; failures surface on first real use
+    try:
+        try:
+            from backend import gemini_utils, tracing
+        except ImportError:
+            import gemini_utils, tracing
+        gemini_utils.get_genai()
+        if tracing.EXPORTER.config()["sink"] == "opik":
+            tracing.get_opik()
+    except Exception as e:
+        log.warning("⚠️ SDK pre-warm failed: %s", e)
+
+
+def startup(prewarm=PREWARM_SDKS):
+    """Runs once before the app serves traffic. Returns the time it took in seconds."""
+    started = time.perf_counter()
+    load_env()
+    configure_logging()
+    init_db()
+    if prewarm:
+        threading.Thread(target=_prewarm, name="sdk-prewarm", daemon=True).start()
+    return time.perf_counter() - started
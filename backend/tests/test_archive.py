@@ -0,0 +1,49 @@
+import sqlite3
+
+from backend import archive, database
+
+
+def _stats(db_name):
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute("SELECT department, total, resolved FROM department_stats ORDER BY department").fetchall()
+    conn.close()
+    return rows
+
+
+def test_archive_run_leaves_department_stats_unchanged(tmp_path, monkeypatch):
+    hot, cold = str(tmp_path / "hot.db"), str(tmp_path / "archive.db")
+    monkeypatch.setattr(database, "DB_NAME", hot)
+    monkeypatch.setattr(archive, "DB_NAME", hot)
+    monkeypatch.setattr(archive, "ARCHIVE_DB_NAME", cold)
+    database.init_db()  # Injects the demo issues
+
+    conn = sqlite3.connect(hot)
+    ids = [row[0] for row in conn.execute("SELECT id FROM issues ORDER BY id LIMIT 3")]
+    conn.close()
+    for issue_id in ids:
+        database.update_issue_status(issue_id, "In Progress")
+        database.update_issue_status(issue_id, "Resolved")
+    conn = sqlite3.connect(hot)
+    conn.execute("UPDATE issues SET status_updated_at = datetime('now', '-60 days')")
+    conn.commit()
+    conn.close()
+    before = _stats(hot)
+
+    assert archive.archive_resolved_issues(older_than_days=30) == 3
+    assert _stats(hot) == before
+
+    # A rebuild from the hot table still counts the moved issues
+    conn = sqlite3.connect(hot)
+    database.rebuild_department_stats(conn.cursor())
+    conn.commit()
+    conn.close()
+    assert _stats(hot) == before
+
+    # The delete trigger is back: real deletes still come out of the totals
+    conn = sqlite3.connect(hot)
+    department = conn.execute("SELECT department FROM issues LIMIT 1").fetchone()[0]
+    conn.execute("DELETE FROM issues WHERE id = (SELECT id FROM issues WHERE department = ? LIMIT 1)", (department,))
+    conn.commit()
+    conn.close()
+    totals = {d: total for d, total, _ in _stats(hot)}
+    assert totals[department] == dict((d, t) for d, t, _ in before)[department] - 1
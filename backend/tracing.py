@@ -0,0 +1,298 @@
+import atexit
+import contextvars
+import datetime
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+import uuid
+
+try:
+    from backend.log_config import get_logger
+except ImportError:
+    from log_config import get_logger
+
+log = get_logger("tracing")
+
+# --- TRACING (sampled, buffered, exported off the request path) ---
+# Agents decorate with track(name). A traced call costs a sampling check and,
+# when sampled, one small sanitized span dict pushed onto a bounded queue; a
+# daemon thread drains the queue in batches to the configured sink:
+#   TRACE_SINK=opik  Opik (default when OPIK_API_KEY is set)
+#   TRACE_SINK=file  JSON lines appended to TRACE_FILE, for offline use
+#   TRACE_SINK=off   nothing (default otherwise)
+# Sampling is per span name: TRACE_SAMPLE_RATES="RAG Retriever=0.1,Feed Ranker=0.5",
+# anything unlisted uses TRACE_SAMPLE_RATE (default 1.0). Child spans follow their
+# root's decision, so a trace is either recorded whole or not at all.
+# When the exporter falls behind, new spans are dropped and counted, never waited on.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_SIZE = 10000
+BATCH_SIZE = 200
+FLUSH_SECONDS = 1.0
+
+# Payload limits: traces get the gist, not a DB dump or an image
+MAX_FIELD_CHARS = 1000
+MAX_ITEMS = 20
+MAX_DEPTH = 4
+REDACTED_KEYS = {"phone", "api_key", "password", "token", "authorization", "email"}
+
+_opik_lock = threading.Lock()
+_opik = None
+_opik_ready = False
+
+# (trace_id, span_id, sampled) of the span we are inside, if any
+_current = contextvars.ContextVar("civicflow_span", default=None)
+
+
+def get_opik():
+    """The configured opik module, or None when it is not installed."""
+    global _opik, _opik_ready
+    if _opik_ready:
+        return _opik
+    with _opik_lock:
+        if not _opik_ready:
+            _load_env()
+            try:
+                import opik
+                if os.environ.get("OPIK_API_KEY"):
+                    opik.configure(use_local=False)
+                _opik = opik
+            except Exception as e:
+                log.warning("⚠️ Opik unavailable, tracing disabled: %s", e)
+            _opik_ready = True
+    return _opik
+
+
+def _load_env():
+    try:
+        from backend.startup import load_env
+    except ImportError:
+        from startup import load_env
+    load_env()
+
+
+def _uuid7():
+    # Opik requires time-ordered UUIDv7 ids; building one avoids importing the SDK
+    value = (int(time.time() * 1000) << 80) | random.getrandbits(80)
+    value = (value & ~(0xF << 76)) | (0x7 << 76)     # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)     # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+def _parse_rates(spec):
+    rates = {}
+    for item in (spec or "").split(","):
+        name, _, rate = item.rpartition("=")
+        if name.strip():
+            try:
+                rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                log.warning("⚠️ Ignoring bad TRACE_SAMPLE_RATES entry: %r", item)
+    return rates
+
+
+def sanitize(value, depth=0):
+    """Bounded, JSON-safe copy of a span payload: truncated, redacted, no raw bytes."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str):
+        if len(value) > MAX_FIELD_CHARS:
+            return value[:MAX_FIELD_CHARS] + f"…[+{len(value) - MAX_FIELD_CHARS} chars]"
+        return value
+    if depth >= MAX_DEPTH:
+        return "…"
+    if isinstance(value, dict):
+        out = {}
+        for i, (key, item) in enumerate(value.items()):
+            if i == MAX_ITEMS:
+                out["…"] = f"+{len(value) - MAX_ITEMS} keys"
+                break
+            key = str(key)
+            out[key] = "[REDACTED]" if key.lower() in REDACTED_KEYS else sanitize(item, depth + 1)
+        return out
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        out = [sanitize(item, depth + 1) for item in items[:MAX_ITEMS]]
+        if len(items) > MAX_ITEMS:
+            out.append(f"…+{len(items) - MAX_ITEMS} items")
+        return out
+    return sanitize(repr(value), depth)
+
+
+# --- SINKS ---
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(span, ensure_ascii=False) + "\n" for span in spans))
+
+
+class OpikSink:
+    def __init__(self):
+        self._client = None
+
+    def export(self, spans):
+        if self._client is None:
+            opik = get_opik()
+            if opik is None:
+                return
+            self._client = opik.Opik()
+        for span in spans:
+            start = datetime.datetime.fromtimestamp(span["start"], datetime.timezone.utc)
+            end = datetime.datetime.fromtimestamp(span["end"], datetime.timezone.utc)
+            common = {"name": span["name"], "start_time": start, "end_time": end,
+                      "input": span["input"], "output": span["output"], "error_info": span["error"]}
+            if span["parent_id"] is None:
+                self._client.trace(id=span["trace_id"], metadata={"sample_rate": span["sample_rate"]}, **common)
+            self._client.span(trace_id=span["trace_id"], id=span["id"], parent_span_id=span["parent_id"], **common)
+
+    def flush(self, timeout):
+        if self._client is not None:
+            self._client.flush(timeout=max(1, int(timeout)))
+
+
+class SpanExporter:
+    def __init__(self, max_queue=QUEUE_SIZE, batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._config_lock = threading.Lock()
+        self._config = None
+        self.exported = 0
+        self.dropped = 0
+
+    # Configuration is read on first use, after startup has loaded .env
+    def config(self):
+        if self._config is None:
+            with self._config_lock:
+                if self._config is None:
+                    _load_env()
+                    sink = os.environ.get("TRACE_SINK") or ("opik" if os.environ.get("OPIK_API_KEY") else "off")
+                    self._config = {
+                        "sink": sink,
+                        "default_rate": float(os.environ.get("TRACE_SAMPLE_RATE", "1.0")),
+                        "rates": _parse_rates(os.environ.get("TRACE_SAMPLE_RATES")),
+                        "file": os.environ.get("TRACE_FILE", os.path.join(BASE_DIR, "traces", "spans.jsonl")),
+                    }
+        return self._config
+
+    def sample_rate(self, name):
+        config = self.config()
+        if config["sink"] == "off":
+            return 0.0
+        return config["rates"].get(name, config["default_rate"])
+
+    def submit(self, span):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Waits (bounded) until everything queued so far has been exported."""
+        deadline = time.time() + timeout
+        while self._thread is not None and self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+        if self._thread is not None and hasattr(self._sink, "flush"):
+            self._sink.flush(deadline - time.time())
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                config = self.config()
+                self._sink = FileSink(config["file"]) if config["sink"] == "file" else OpikSink()
+                self._thread = threading.Thread(target=self._loop, name="civicflow-trace-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives within the flush window
+            deadline = time.time() + self._flush_seconds
+            try:
+                while len(batch) < self._batch_size:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                pass
+            try:
+                self._sink.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                log.warning("⚠️ Trace export of %d spans failed: %s", len(batch), e)
+            for _ in batch:
+                self._queue.task_done()
+
+
+EXPORTER = SpanExporter()
+
+
+def track(name):
+    """Drop-in for @opik.track(name=...): sampled, sanitized, exported in the background."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                rate = EXPORTER.sample_rate(name)
+                sampled = rate > 0 and (rate >= 1 or random.random() < rate)
+                trace_id = _uuid7() if sampled else None
+            else:
+                trace_id, _, sampled = parent
+                rate = None
+            if not sampled:
+                # Children see the decision and skip too
+                token = _current.set((None, None, False))
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+
+            span_id = _uuid7()
+            token = _current.set((trace_id, span_id, True))
+            start = time.time()
+            output, error = None, None
+            try:
+                output = fn(*args, **kwargs)
+                return output
+            except Exception as e:
+                error = {"exception_type": type(e).__name__, "message": str(e)[:MAX_FIELD_CHARS],
+                         "traceback": traceback.format_exc()[-MAX_FIELD_CHARS:]}
+                raise
+            finally:
+                _current.reset(token)
+                try:
+                    inputs = dict(signature.bind_partial(*args, **kwargs).arguments)
+                except TypeError:
+                    inputs = {"args": args, "kwargs": kwargs}
+                EXPORTER.submit({
+                    "id": span_id,
+                    "trace_id": trace_id,
+                    "parent_id": parent[1] if parent else None,
+                    "name": name,
+                    "start": start,
+                    "end": time.time(),
+                    "input": sanitize(inputs),
+                    "output": sanitize(output if isinstance(output, dict) else {"output": output}),
+                    "error": error,
+                    "sample_rate": rate,
+                })
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+import json
+import math
+import threading
+
+try:
+    from backend.database import get_volunteer_rows
+    from backend.log_config import get_logger
+except ImportError:
+    from database import get_volunteer_rows
+    from log_config import get_logger
+
+log = get_logger("volunteer_index")
+
+# --- VOLUNTEER INDEX ---
+# In-memory spatial (lat/lon grid) and skill (inverted) index over the users
+# table, loaded once per process on first use and updated in place when a
+# profile is saved. Radius queries only visit the grid cells the circle
+# overlaps, so publish-time fan-out and dispatch never scan every volunteer.
+# Per-process: with several workers, a profile saved through one worker reaches
+# the others on their next restart.
+CELL_DEG = 0.05  # ~5.5 km; a 10 km radius touches at most 5x5 cells
+KM_PER_DEG = 111
+
+# Issue tags that call for a skill with a different name
+TAG_SKILLS = {
+    "health": ("medical",),
+    "elderly": ("medical", "counseling"),
+    "education": ("teaching",),
+    "food": ("cooking",),
+    "community": ("cooking",),
+    "charity": ("cooking",),
+    "infrastructure": ("construction",),
+    "flood": ("rescue", "transport"),
+}
+
+
+def dist_km(lat1, lon1, lat2, lon2):
+    # Same flat-earth approximation as get_nearby_volunteers; fine at city scale
+    return ((lat1 - lat2) ** 2 + (lon1 - lon2) ** 2) ** 0.5 * KM_PER_DEG
+
+
+def cell_of(lat, lon):
+    return (math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG))
+
+
+def skill_names(skills):
+    """JSON list, comma-separated string or list -> tuple of skill names as written."""
+    if isinstance(skills, str):
+        try:
+            skills = json.loads(skills)
+        except ValueError:
+            skills = skills.split(",")
+    return tuple(s.strip() for s in skills or () if isinstance(s, str) and s.strip())
+
+
+def parse_skills(skills):
+    """Same as skill_names, lowercased for matching."""
+    return tuple(s.lower() for s in skill_names(skills))
+
+
+def skills_for_tags(tags):
+    """Issue tags -> set of skills that match them (a tag matches a skill of the same name)."""
+    wanted = set()
+    for tag in parse_skills(tags):
+        wanted.add(tag)
+        wanted.update(TAG_SKILLS.get(tag, ()))
+    return wanted
+
+
+class VolunteerIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._profiles = {}   # user_id -> profile dict (skills as a lowercase tuple)
+        self._cells = {}      # (row, col) -> set of user_ids
+        self._skills = {}     # skill -> set of user_ids
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for row in get_volunteer_rows():
+                self._add(row)
+            self._loaded = True
+            log.info("Indexed %d volunteers in %d cells", len(self._profiles), len(self._cells))
+
+    def _add(self, row):
+        profile = dict(row)
+        profile['skill_names'] = skill_names(profile.get('skills'))
+        profile['skills'] = tuple(s.lower() for s in profile['skill_names'])
+        self._profiles[profile['id']] = profile
+        if profile.get('lat') is not None and profile.get('lon') is not None:
+            self._cells.setdefault(cell_of(profile['lat'], profile['lon']), set()).add(profile['id'])
+        for skill in profile['skills']:
+            self._skills.setdefault(skill, set()).add(profile['id'])
+
+    def _remove(self, user_id):
+        profile = self._profiles.pop(user_id, None)
+        if profile is None:
+            return
+        if profile.get('lat') is not None and profile.get('lon') is not None:
+            cell = cell_of(profile['lat'], profile['lon'])
+            self._cells.get(cell, set()).discard(user_id)
+            if not self._cells.get(cell):
+                self._cells.pop(cell, None)
+        for skill in profile['skills']:
+            self._skills.get(skill, set()).discard(user_id)
+
+    def upsert(self, row):
+        """Adds or replaces one volunteer (a users row as a dict)."""
+        self._ensure_loaded()
+        with self._lock:
+            self._remove(row['id'])
+            self._add(row)
+
+    def reload(self):
+        with self._lock:
+            self._profiles, self._cells, self._skills = {}, {}, {}
+            self._loaded = False
+        self._ensure_loaded()
+
+    def get(self, user_id):
+        self._ensure_loaded()
+        return self._profiles.get(user_id)
+
+    def with_skills(self, skills):
+        """User ids having any of skills."""
+        self._ensure_loaded()
+        with self._lock:
+            return set().union(*(self._skills.get(s, ()) for s in skills))
+
+    def within(self, lat, lon, radius_km):
+        """[(profile, dist_km)] for volunteers within radius_km, nearest first."""
+        self._ensure_loaded()
+        reach = radius_km / KM_PER_DEG
+        r0, c0 = cell_of(lat - reach, lon - reach)
+        r1, c1 = cell_of(lat + reach, lon + reach)
+        found = []
+        with self._lock:
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    for user_id in self._cells.get((r, c), ()):
+                        profile = self._profiles[user_id]
+                        d = dist_km(lat, lon, profile['lat'], profile['lon'])
+                        if d <= radius_km:
+                            found.append((profile, d))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._profiles)
+
+
+VOLUNTEER_INDEX = VolunteerIndex()
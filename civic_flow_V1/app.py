@@ -26,27 +26,38 @@ if opik_key:
     opik.configure(use_local=False)
 
 # --- DATABASE ENGINE ---
-DB_FILE = "complaints.json"
+from storage import CaseStore
+
 CITY_LAT = 29.3956
 CITY_LON = 71.6833
 
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return []
-    with open(DB_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+@st.cache_resource
+def get_store():
+    # One store per Streamlit server: the log is replayed once, not on every rerun
+    return CaseStore()
+
+FEED_SIZE = 50 # Newest cases shown in the sidebar / under the map
+MAP_ZOOM = 13
+
+def load_feed():
+    """Newest cases, straight from the store's presorted in-memory index"""
+    cases, _ = get_store().query(limit=FEED_SIZE)
+    return cases
+
+@st.cache_resource(max_entries=4)
+def load_map_frame(version):
+    # Keyed by store version: rebuilt only after a write (ours or another process's)
+    df = pd.DataFrame(get_store().clusters(MAP_ZOOM))
+    if not df.empty:
+        df['size'] = 60 * df['count'] ** 0.5
+    return df
 
 def save_new_issue(issue_data, plan_data):
-    data = load_db()
     # Random jitter for map visualization
     lat_offset = random.uniform(-0.02, 0.02)
     lon_offset = random.uniform(-0.02, 0.02)
     
     new_record = {
-        "id": len(data) + 1,
         "issue": issue_data['issue'],
         "location": issue_data['location'],
         "lat": CITY_LAT + lat_offset,
@@ -60,30 +71,17 @@ def save_new_issue(issue_data, plan_data):
         "plan": plan_data,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
     }
-    data.append(new_record)
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-    return new_record
+    return get_store().create(new_record)
 
 def add_vote(issue_id):
-    data = load_db()
-    for item in data:
-        if item['id'] == issue_id:
-            item['votes'] += 1
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    get_store().vote(issue_id)
 
 def add_comment(issue_id, comment_text):
-    data = load_db()
-    for item in data:
-        if item['id'] == issue_id:
-            item['comments'].append({
-                "user": "Neighbor",
-                "text": comment_text,
-                "time": datetime.now().strftime("%H:%M")
-            })
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    get_store().add_comment(issue_id, {
+        "user": "Neighbor",
+        "text": comment_text,
+        "time": datetime.now().strftime("%H:%M")
+    })
 
 # --- AI AGENTS (Tracked by Opik) ---
 @opik.track(name="CivicFlow Inspector")
@@ -168,11 +166,11 @@ with st.sidebar:
     st.divider()
     st.subheader("Your Community Feed")
     
-    db = load_db()
-    if not db:
+    feed = load_feed() # Once per rerun; writes update the shared store in place
+    if not feed:
         st.caption("No active reports.")
     else:
-        for item in reversed(db):
+        for item in feed:
             with st.container(border=True):
                 st.write(f"**{item['issue']}**")
                 st.caption(f"📍 {item['location']}")
@@ -225,8 +223,8 @@ if "current_report" in st.session_state and st.session_state.current_report:
     
     st.divider()
     st.subheader("💬 Community Voices")
-    fresh_data = load_db()
-    current_comments = next((item.get('comments', []) for item in fresh_data if item['id'] == report['id']), [])
+    fresh_case = get_store().get(report['id']) or {}
+    current_comments = fresh_case.get('comments', [])
     for c in current_comments:
         st.text(f"👤 {c['user']}: {c['text']}")
     new_comment = st.text_input("Add your voice:", key="new_comment_box")
@@ -277,13 +275,12 @@ else:
 
     with tab2:
         st.subheader("📍 Live Cases in Bahawalpur")
-        db = load_db()
-        map_items = [item for item in db if 'lat' in item]
+        map_items = [item for item in feed if 'lat' in item]
         
         if map_items:
-            df = pd.DataFrame(map_items)
-            # Large Main Map
-            st.map(df, latitude='lat', longitude='lon', size=60, color="#ff4b4b", zoom=13)
+            # Large Main Map: pre-aggregated clusters, one point per cluster
+            df = load_map_frame(get_store().version)
+            st.map(df, latitude='lat', longitude='lon', size='size', color="#ff4b4b", zoom=MAP_ZOOM)
             
             # Clickable List Below Map
             st.write("### 📂 Open a Case from the Map:")
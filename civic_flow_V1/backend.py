@@ -1,6 +1,6 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, Response
 import google.generativeai as genai
 import os
 import json
@@ -10,6 +10,7 @@ import opik
 from fpdf import FPDF
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import Optional
 
 # 1. SETUP
 load_dotenv()
@@ -21,6 +22,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # /cases paging; browsers hide other headers from JS
 )
 
 # CONFIG
@@ -35,22 +37,14 @@ if os.environ.get("OPIK_API_KEY"):
     opik.configure(use_local=False)
 
 # --- DATABASE ENGINE ---
-DB_FILE = "complaints.json"
+from storage import CaseStore
+
 CITY_LAT = 29.3956
 CITY_LON = 71.6833
 
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return []
-    with open(DB_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+STORE = CaseStore() # Append-only log, replayed once at startup
 
 def save_new_issue(issue_data, plan_data):
-    data = load_db()
-    
     # Check for duplicates to prevent spam
     # (Simple check: same issue title within last 5 minutes - skipped for hackathon demo speed)
 
@@ -58,7 +52,6 @@ def save_new_issue(issue_data, plan_data):
     lon_offset = random.uniform(-0.02, 0.02)
     
     new_record = {
-        "id": len(data) + 1,
         "issue": issue_data['issue'],
         "location": issue_data['location'],
         "lat": CITY_LAT + lat_offset, # In real app, geocode the location string
@@ -72,10 +65,8 @@ def save_new_issue(issue_data, plan_data):
         "plan": plan_data,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
     }
-    data.append(new_record)
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-    return new_record
+    # id is allocated inside the store, under its lock
+    return STORE.create(new_record)
 
 # --- AI LOGIC ---
 @opik.track(name="CivicFlow Inspector")
@@ -143,11 +134,44 @@ async def serve_ui():
     with open("index.html", "r", encoding='utf-8') as f:
         return f.read()
 
+MAX_CASES_PAGE = 2000
+
 @app.get("/cases")
-async def get_cases():
-    """Returns all active cases for the heatmap"""
-    db = load_db()
-    return sorted(db, key=lambda x: x['id'], reverse=True) # Newest first
+async def get_cases(
+    response: Response,
+    min_lat: Optional[float] = None,
+    min_lon: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lon: Optional[float] = None,
+    min_severity: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = 500,
+    cursor: Optional[int] = None
+):
+    """Returns cases for the heatmap, newest first, limited to the map viewport when a bbox is given"""
+    bbox = None
+    if None not in (min_lat, min_lon, max_lat, max_lon):
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+
+    cases, next_cursor = STORE.query(bbox, min_severity, status, max(1, min(limit, MAX_CASES_PAGE)), cursor)
+    # Body stays a plain list for the existing UI; paging goes in a header
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return cases
+
+@app.get("/clusters")
+async def get_clusters(
+    zoom: int = 13,
+    min_lat: Optional[float] = None,
+    min_lon: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lon: Optional[float] = None
+):
+    """Map clusters (count + max severity) for the viewport at a zoom level"""
+    bbox = None
+    if None not in (min_lat, min_lon, max_lat, max_lon):
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+    return STORE.clusters(zoom, bbox)
 
 @app.post("/analyze")
 async def analyze_report(
@@ -0,0 +1,67 @@
+import math
+
+# --- MAP CLUSTER PYRAMID ---
+# Pre-aggregated clusters for every zoom level, updated incrementally as cases
+# are added. At zoom z a map tile spans 360 / 2**z degrees; each tile is split
+# into CELLS_PER_TILE x CELLS_PER_TILE cluster cells. Serving a viewport costs
+# O(visible clusters), never O(cases).
+MIN_ZOOM = 3
+MAX_ZOOM = 18
+CELLS_PER_TILE = 8
+
+
+def cell_size(zoom):
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+class ClusterPyramid:
+    def __init__(self, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        # zoom -> {(x, y): [count, max_severity, sum_lat, sum_lon, last_id]}
+        self._levels = {z: {} for z in range(min_zoom, max_zoom + 1)}
+
+    def clamp(self, zoom):
+        return max(self.min_zoom, min(self.max_zoom, int(zoom)))
+
+    def add(self, case_id, lat, lon, severity):
+        for zoom, cells in self._levels.items():
+            size = cell_size(zoom)
+            key = (math.floor((lon + 180) / size), math.floor((lat + 90) / size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, severity, lat, lon, case_id]
+            else:
+                cell[0] += 1
+                cell[1] = max(cell[1], severity)
+                cell[2] += lat
+                cell[3] += lon
+                cell[4] = max(cell[4], case_id)
+
+    def query(self, zoom, bbox=None):
+        """Clusters at a zoom level, optionally only those inside bbox = (min_lat, min_lon, max_lat, max_lon)."""
+        zoom = self.clamp(zoom)
+        cells = self._levels[zoom]
+        size = cell_size(zoom)
+
+        if bbox:
+            x0, y0 = math.floor((bbox[1] + 180) / size), math.floor((bbox[0] + 90) / size)
+            x1, y1 = math.floor((bbox[3] + 180) / size), math.floor((bbox[2] + 90) / size)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+                keys = [k for k in cells if x0 <= k[0] <= x1 and y0 <= k[1] <= y1]
+            else:
+                keys = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in cells]
+        else:
+            keys = list(cells)
+
+        clusters = []
+        for key in keys:
+            count, max_severity, sum_lat, sum_lon, last_id = cells[key]
+            clusters.append({
+                "lat": sum_lat / count, # Centroid of the cases, not the cell centre
+                "lon": sum_lon / count,
+                "count": count,
+                "max_severity": max_severity,
+                "id": last_id if count == 1 else None # Single case: open it directly
+            })
+        return clusters
@@ -0,0 +1,51 @@
+import heapq
+import math
+from bisect import insort
+
+# --- GRID SPATIAL INDEX ---
+# Buckets case ids by a fixed lat/lon grid (0.01 deg ~ 1.1 km). A bounding-box
+# query only visits the cells it overlaps; each cell keeps its ids sorted so the
+# newest-first merge across cells can stop as soon as the page is full.
+CELL_DEG = 0.01
+
+
+def cell_of(lat, lon, cell_deg=CELL_DEG):
+    return (math.floor(lat / cell_deg), math.floor(lon / cell_deg))
+
+
+class GridIndex:
+    def __init__(self, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells = {}     # (row, col) -> sorted list of ids
+        self._cell_of = {}   # id -> (row, col)
+
+    def add(self, case_id, lat, lon):
+        if case_id in self._cell_of:
+            self.remove(case_id)
+        cell = cell_of(lat, lon, self.cell_deg)
+        ids = self._cells.setdefault(cell, [])
+        if not ids or ids[-1] < case_id:
+            ids.append(case_id) # New cases have the highest id: O(1)
+        else:
+            insort(ids, case_id)
+        self._cell_of[case_id] = cell
+
+    def remove(self, case_id):
+        cell = self._cell_of.pop(case_id, None)
+        if cell is not None:
+            self._cells[cell].remove(case_id)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def cells_in(self, min_lat, min_lon, max_lat, max_lon):
+        r0, c0 = cell_of(min_lat, min_lon, self.cell_deg)
+        r1, c1 = cell_of(max_lat, max_lon, self.cell_deg)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self._cells):
+            # Box covers more cells than exist: walk the occupied ones instead
+            return [cell for cell in self._cells if r0 <= cell[0] <= r1 and c0 <= cell[1] <= c1]
+        return [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) if (r, c) in self._cells]
+
+    def iter_newest_first(self, min_lat, min_lon, max_lat, max_lon):
+        """Candidate ids in the box, highest id first (cells overlap the box edges)."""
+        lists = [reversed(self._cells[cell]) for cell in self.cells_in(min_lat, min_lon, max_lat, max_lon)]
+        return heapq.merge(*lists, reverse=True)
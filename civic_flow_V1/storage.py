@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+from clusters import ClusterPyramid
+from spatial import GridIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+# --- CASE STORE: APPEND-ONLY LOG + IN-MEMORY INDEX ---
+# Every write is one JSON line appended to complaints.jsonl:
+#   {"op": "put", "case": {...}}                     new case (or snapshot)
+#   {"op": "vote", "id": 3}
+#   {"op": "comment", "id": 3, "comment": {...}}
+# The log is replayed once at startup into a dict keyed by id. When the log
+# grows well past the number of live cases it is compacted into one "put" per case.
+#
+# Several processes (FastAPI V1, Streamlit sessions) may share the log:
+# - writers hold an exclusive fcntl lock on complaints.jsonl.lock, catch up on
+#   other writers' lines, append, fsync, then release;
+# - readers stat the log and only read the bytes appended since last time
+#   (or reload after another process compacted it);
+# - compaction writes a temp file, fsyncs it and renames it over the log.
+LOG_FILE = "complaints.jsonl"
+LEGACY_DB_FILE = "complaints.json"
+
+COMPACT_MIN_OPS = 1000
+COMPACT_RATIO = 2.0
+
+
+class CaseStore:
+    def __init__(self, log_path=LOG_FILE, legacy_path=LEGACY_DB_FILE):
+        self.log_path = log_path
+        self.legacy_path = legacy_path
+        self.lock_path = log_path + ".lock"
+        self._lock = threading.RLock()
+        self._cases = {}
+        self._ids = []          # Case ids, ascending (newest = last)
+        self._grid = GridIndex()
+        self._clusters = ClusterPyramid()
+        self._next_id = 1
+        self._ops = 0
+        self._offset = 0        # Bytes of the log already applied
+        self._file_id = None    # (st_dev, st_ino) of the log we applied
+        self.version = 0        # Bumped on every change we observe
+        with self._lock, self._file_lock():
+            if not os.path.exists(self.log_path) and os.path.exists(self.legacy_path):
+                self._import_legacy()
+            self._refresh()
+
+    # --- READS (in-memory; treat returned cases as read-only) ---
+    def list(self):
+        """All cases, oldest first (same order the old JSON file had)."""
+        with self._lock:
+            self._refresh()
+            return list(self._cases.values())
+
+    def get(self, case_id):
+        with self._lock:
+            self._refresh()
+            return self._cases.get(case_id)
+
+    def query(self, bbox=None, min_severity=None, status=None, limit=100, before_id=None):
+        """
+        Newest-first page of cases. bbox = (min_lat, min_lon, max_lat, max_lon)
+        is answered from the grid index; before_id is the cursor from the last
+        page. Returns (cases, next_cursor).
+        """
+        with self._lock:
+            self._refresh()
+            if bbox:
+                candidates = self._grid.iter_newest_first(*bbox)
+            else:
+                end = bisect_left(self._ids, before_id) if before_id is not None else len(self._ids)
+                candidates = (self._ids[i] for i in range(end - 1, -1, -1))
+
+            page = []
+            for case_id in candidates:
+                if before_id is not None and case_id >= before_id:
+                    continue
+                case = self._cases[case_id]
+                if bbox and not (bbox[0] <= case['lat'] <= bbox[2] and bbox[1] <= case['lon'] <= bbox[3]):
+                    continue
+                if min_severity is not None and case.get('severity', 0) < min_severity:
+                    continue
+                if status and case.get('status') != status:
+                    continue
+                if len(page) == limit:
+                    # One more match exists: hand out a cursor
+                    return page, page[-1]['id']
+                page.append(case)
+            return page, None
+
+    def clusters(self, zoom, bbox=None):
+        """Pre-aggregated map clusters for a zoom level (see clusters.py)."""
+        with self._lock:
+            self._refresh()
+            return self._clusters.query(zoom, bbox)
+
+    # --- WRITES (O(1): one appended line) ---
+    def create(self, record):
+        """Allocates the next id atomically (across processes), appends the case and returns it."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            case = {"id": self._next_id, **record}
+            self._write({"op": "put", "case": case})
+            return case
+
+    def vote(self, case_id):
+        with self._lock, self._file_lock():
+            self._refresh()
+            if case_id in self._cases:
+                self._write({"op": "vote", "id": case_id})
+
+    def add_comment(self, case_id, comment):
+        with self._lock, self._file_lock():
+            self._refresh()
+            if case_id in self._cases:
+                self._write({"op": "comment", "id": case_id, "comment": comment})
+
+    def compact(self):
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._compact()
+
+    # --- INTERNALS ---
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Applies whatever other processes appended since we last looked."""
+        # Stat the open handle, not the path: a compaction renaming a new file in
+        # between would otherwise have us read the new file at the old offset
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            file_id = (st.st_dev, st.st_ino)
+            if file_id != self._file_id:
+                # First load, or another process compacted (renamed a new file in)
+                self._cases, self._next_id, self._ops, self._offset = {}, 1, 0, 0
+                self._ids, self._grid, self._clusters = [], GridIndex(), ClusterPyramid()
+                self._file_id = file_id
+            if st.st_size == self._offset:
+                return
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        # Only complete lines; a torn tail (crashed writer) is left unapplied
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (json.JSONDecodeError, KeyError) as e:
+                log.warning("⚠️ Skipping corrupt log line in %s: %s", self.log_path, e)
+        self._offset += end
+        self.version += 1
+
+    def _import_legacy(self):
+        # One-time migration from the old whole-file JSON DB
+        with open(self.legacy_path, "r") as f:
+            try:
+                legacy = json.load(f)
+            except json.JSONDecodeError as e:
+                log.warning("⚠️ %s is corrupt (%s); starting with an empty log", self.legacy_path, e)
+                legacy = []
+        for case in legacy:
+            self._apply({"op": "put", "case": case})
+        self._compact()
+        log.info("📦 Migrated %d cases from %s to %s", len(legacy), self.legacy_path, self.log_path)
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == "put":
+            case = record["case"]
+            case.setdefault("comments", [])
+            is_new = case["id"] not in self._cases
+            if is_new:
+                if not self._ids or self._ids[-1] < case["id"]:
+                    self._ids.append(case["id"])
+                else:
+                    insort(self._ids, case["id"])
+            self._cases[case["id"]] = case
+            if case.get("lat") is not None and case.get("lon") is not None:
+                self._grid.add(case["id"], case["lat"], case["lon"])
+                if is_new:
+                    self._clusters.add(case["id"], case["lat"], case["lon"], case.get("severity", 0))
+            self._next_id = max(self._next_id, case["id"] + 1)
+        elif op == "vote" and record["id"] in self._cases:
+            self._cases[record["id"]]["votes"] = self._cases[record["id"]].get("votes", 0) + 1
+        elif op == "comment" and record["id"] in self._cases:
+            self._cases[record["id"]]["comments"].append(record["comment"])
+        self._ops += 1
+
+    def _write(self, record):
+        # Caller holds the file lock and has just refreshed
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.log_path, "ab") as f:
+            if f.tell() != self._offset:
+                # Torn tail from a crashed writer: drop it before appending
+                f.truncate(self._offset)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+        self._file_id = (st.st_dev, st.st_ino)
+        self._apply(record)
+        self._offset += len(line)
+        self.version += 1
+        if self._ops >= COMPACT_MIN_OPS and self._ops > COMPACT_RATIO * len(self._cases):
+            self._compact()
+
+    def _compact(self):
+        """Rewrites the log as one snapshot line per case: temp file + fsync + rename."""
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for case in self._cases.values():
+                f.write((json.dumps({"op": "put", "case": case}, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp_path, self.log_path)
+        self._fsync_dir()
+
+        st = os.stat(self.log_path)
+        self._file_id = (st.st_dev, st.st_ino)
+        self._offset = size
+        self._ops = len(self._cases)
+
+    def _fsync_dir(self):
+        # Make the rename itself durable (POSIX only)
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.log_path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -1,8 +1,37 @@
 import streamlit as st
 import requests
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_URL = "http://127.0.0.1:8000"
 
+# (connect, read) timeouts in seconds: AI endpoints are slow, polling is not
+AI_TIMEOUT = (3, 90)
+FAST_TIMEOUT = (3, 10)
+NOTICE_MAX_WAIT = 120
+
+@st.cache_resource
+def get_http():
+    # One keep-alive pool per Streamlit server, shared by every session
+    session = requests.Session()
+    # Gateway errors are retried for GETs only: a POST may have gone through
+    # (/report, /publish_issue, /comments would duplicate). Connection failures
+    # are still retried for every method, since nothing reached the server.
+    retry = Retry(total=2, connect=2, read=0, status=2, backoff_factor=0.3,
+                  status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET"}))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_feed(skills):
+    payload = {"user_skills": skills, "user_lat": 29.3950, "user_lon": 71.6830}
+    res = get_http().post(f"{API_URL}/my_feed", data=payload, timeout=AI_TIMEOUT)
+    if res.status_code != 200:
+        return None
+    return res.json().get("feed", [])
+
 st.set_page_config(page_title="CivicFlow", page_icon="🇵🇰", layout="centered")
 st.title("CivicFlow: Community Connect")
 
@@ -20,7 +49,7 @@ with tab1:
             data = {"description": desc}
             
             try:
-                res = requests.post(f"{API_URL}/report", data=data, files=files)
+                res = get_http().post(f"{API_URL}/report", data=data, files=files, timeout=AI_TIMEOUT)
                 if res.status_code == 200:
                     data = res.json()
                     st.success("Report Saved!")
@@ -37,41 +66,55 @@ with tab2:
     c1, c2 = st.columns(2)
     my_skills = c1.text_input("My Skills", "Medical, Rescue")
     
-    if st.button("Refresh My Feed"):
-        payload = {"user_skills": my_skills, "user_lat": 29.3950, "user_lon": 71.6830}
-        
+    # Fetched only when asked for (the AI-ranked feed is slow), then kept for the
+    # session; the buttons inside the feed rerun the script but reuse this copy
+    if st.button("Load My Feed" if "feed" not in st.session_state else "Refresh My Feed"):
         try:
-            res = requests.post(f"{API_URL}/my_feed", data=payload)
-            if res.status_code == 200:
-                feed = res.json().get("feed", [])
-                
-                for item in feed:
-                    is_govt = item['category'] == 'GOVT'
-                    color = "red" if is_govt else "green"
-                    icon = "🏛️" if is_govt else "🤝"
-                    
-                    with st.container(border=True):
-                        st.markdown(f"### {icon} :{color}[{item['title']}]")
-                        st.caption(f"📍 {item.get('dist_km', 1)} km away • Severity: {item['severity']}/10")
-                        st.info(f"💡 {item['reason']}")
-                        st.write(item['description'])
-                        
-                        # ACTION BUTTONS
-                        if is_govt:
-                            if st.button("✍️ Join Campaign (Legal Notice)", key=f"join_{item['id']}"):
-                                with st.spinner("Drafting Legal Notice..."):
-                                    pdf_res = requests.post(f"{API_URL}/generate_legal_notice", data={"issue_id": item['id']})
-                                    if pdf_res.status_code == 200:
-                                        pdf_data = pdf_res.json()
-                                        st.success("Legal Notice Generated!")
-                                        st.markdown(f"[📥 **Download PDF**]({API_URL}/download_pdf/{pdf_data['filename']})")
-                                        with st.expander("Preview Text"):
-                                            st.write(pdf_data['preview_text'])
-                        else:
-                            if st.button("🙋‍♂️ I'll Volunteer", key=f"help_{item['id']}", type="primary"):
-                                st.balloons()
-                                st.success("Thank you! Coordination details sent.")
-            else:
-                st.warning("No issues found.")
+            st.session_state.feed = fetch_feed(my_skills)
         except Exception as e:
-            st.error(f"Feed Error: {e}")
\ No newline at end of file
+            st.session_state.feed = None
+            st.error(f"Feed Error: {e}")
+
+    feed = st.session_state.get("feed", [])
+    if "feed" not in st.session_state:
+        st.info("Press Load My Feed to see tasks matched to your skills.")
+    elif feed is None:
+        st.warning("No issues found.")
+    else:
+        for item in feed:
+            is_govt = item['category'] == 'GOVT'
+            color = "red" if is_govt else "green"
+            icon = "🏛️" if is_govt else "🤝"
+            
+            with st.container(border=True):
+                st.markdown(f"### {icon} :{color}[{item['title']}]")
+                st.caption(f"📍 {item.get('dist_km', 1)} km away • Severity: {item['severity']}/10")
+                st.info(f"💡 {item['reason']}")
+                st.write(item['description'])
+                
+                # ACTION BUTTONS
+                if is_govt:
+                    if st.button("✍️ Join Campaign (Legal Notice)", key=f"join_{item['id']}"):
+                        with st.spinner("Drafting Legal Notice..."):
+                            try:
+                                http = get_http()
+                                pdf_res = http.post(f"{API_URL}/generate_legal_notice", data={"issue_id": item['id']}, timeout=FAST_TIMEOUT)
+                                pdf_data = pdf_res.json() if pdf_res.status_code == 200 else {}
+                                # Notice is rendered in the background unless already cached
+                                deadline = time.time() + NOTICE_MAX_WAIT
+                                while pdf_data.get('status') in ("queued", "running") and time.time() < deadline:
+                                    time.sleep(1)
+                                    pdf_data = http.get(f"{API_URL}/notice_jobs/{pdf_data['job_id']}", timeout=FAST_TIMEOUT).json()
+                            except requests.RequestException as e:
+                                pdf_data = {"error": f"Connection Failed: {e}"}
+                            if pdf_data.get('status') == "done":
+                                st.success("Legal Notice Generated!")
+                                st.markdown(f"[📥 **Download PDF**]({API_URL}/download_pdf/{pdf_data['filename']})")
+                                with st.expander("Preview Text"):
+                                    st.write(pdf_data['preview_text'])
+                            else:
+                                st.error(pdf_data.get('error', "Notice generation failed"))
+                else:
+                    if st.button("🙋‍♂️ I'll Volunteer", key=f"help_{item['id']}", type="primary"):
+                        st.balloons()
+                        st.success("Thank you! Coordination details sent.")